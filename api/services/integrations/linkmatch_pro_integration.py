@@ -7,15 +7,20 @@ Leverages AI insights, bulk exports, and connection management.
 """
 
 import os
+import re
 import logging
 import json
+import time
+from contextlib import asynccontextmanager
 from typing import Dict, List, Any, Optional
 from datetime import datetime, timedelta
 from pydantic import BaseModel
 from sqlalchemy import create_engine, text
 from sqlalchemy.exc import SQLAlchemyError
 from dotenv import load_dotenv
+import asyncio
 import httpx
+import pandas as pd
 
 # Load environment variables
 load_dotenv()
@@ -37,6 +42,166 @@ engine = create_engine(DB_URL)
 # HubSpot API base URL
 HUBSPOT_API_BASE = "https://api.hubapi.com"
 
+# HTTP/2 needs the optional h2 package
+try:
+	import h2  # noqa: F401
+	_HTTP2 = True
+except ImportError:
+	_HTTP2 = False
+
+# orjson parses HubSpot payloads and serializes profile patches faster than
+# the stdlib; fall back to json when it is not installed
+try:
+	import orjson
+	_json_loads = orjson.loads
+	
+	def _json_dumps(obj) -> str:
+		return orjson.dumps(obj).decode()
+except ImportError:
+	_json_loads = json.loads
+	_json_dumps = json.dumps
+
+# One pooled client for every HubSpot call so TCP/TLS connections are reused
+_client = httpx.AsyncClient(
+	base_url=HUBSPOT_API_BASE,
+	headers={
+		"Authorization": f"Bearer {HUBSPOT_API_KEY}",
+		"Content-Type": "application/json"
+	},
+	timeout=15.0,
+	http2=_HTTP2,
+	limits=httpx.Limits(max_connections=32, max_keepalive_connections=32)
+)
+
+# HubSpot caps batch/read at 100 inputs per request
+HUBSPOT_BATCH_READ_LIMIT = 100
+
+# Rows requested per contacts/search page
+HUBSPOT_SEARCH_PAGE_SIZE = 100
+
+# LinkMatch data changes on the order of hours; cache per-contact reads briefly
+CACHE_TTL_SECONDS = 300
+CACHE_MAXSIZE = 10_000
+_profile_cache: Dict[str, tuple] = {}
+_insights_cache: Dict[str, tuple] = {}
+
+# Leads processed in parallel by the auto-connect workflow
+AUTO_CONNECT_CONCURRENCY = 10
+
+# Outbound HubSpot limits: in-flight cap plus the published 100 req / 10s budget
+HUBSPOT_MAX_IN_FLIGHT = 20
+HUBSPOT_MAX_RETRIES = 3
+
+# linkedin_actions rows are buffered and written in batches of up to
+# ACTION_FLUSH_BATCH rows, at most ACTION_FLUSH_INTERVAL seconds after queueing
+ACTION_FLUSH_BATCH = 200
+ACTION_FLUSH_INTERVAL = 0.2
+# A failed batch is retried every ACTION_RETRY_DELAY seconds; flushes give up
+# waiting after ACTION_FLUSH_TIMEOUT seconds
+ACTION_RETRY_DELAY = 2.0
+ACTION_FLUSH_TIMEOUT = 30.0
+_action_queue: asyncio.Queue = asyncio.Queue(maxsize=10_000)
+_action_flusher_task: Optional[asyncio.Task] = None
+
+
+class TokenBucket:
+	"""Async token bucket: `rate` tokens/sec refill, bursts up to `capacity`"""
+	
+	def __init__(self, rate: float, capacity: int):
+		self.rate = rate
+		self.capacity = capacity
+		self.tokens = float(capacity)
+		self.updated_at = time.monotonic()
+		self._lock = asyncio.Lock()
+	
+	async def acquire(self) -> None:
+		async with self._lock:
+			while True:
+				now = time.monotonic()
+				self.tokens = min(self.capacity, self.tokens + (now - self.updated_at) * self.rate)
+				self.updated_at = now
+				if self.tokens >= 1:
+					self.tokens -= 1
+					return
+				await asyncio.sleep((1 - self.tokens) / self.rate)
+
+
+_hubspot_sem = asyncio.Semaphore(HUBSPOT_MAX_IN_FLIGHT)
+_hubspot_bucket = TokenBucket(rate=10, capacity=100)
+
+
+async def _hubspot_request(method: str, url: str, **kwargs) -> httpx.Response:
+	"""Send a HubSpot request through the shared limits, backing off on 429"""
+	for attempt in range(HUBSPOT_MAX_RETRIES + 1):
+		async with _hubspot_sem:
+			await _hubspot_bucket.acquire()
+			response = await _client.request(method, url, **kwargs)
+		
+		if response.status_code != 429 or attempt == HUBSPOT_MAX_RETRIES:
+			return response
+		
+		retry_after = response.headers.get("Retry-After")
+		delay = float(retry_after) if retry_after and retry_after.isdigit() else 2 ** attempt
+		logger.warning(f"HubSpot rate limited, retrying in {delay}s")
+		await asyncio.sleep(delay)
+	
+# LinkMatch Pro custom fields in HubSpot
+LINKEDIN_PROFILE_PROPERTIES = [
+	"linkedin_profile_url",
+	"linkedin_headline",
+	"linkedin_bio",
+	"linkedin_connections_count",
+	"linkedin_posts_count",
+	"linkedin_last_activity_date",
+	"linkmatch_connection_status",
+	"linkmatch_verified_email",
+	"linkmatch_sync_date"
+]
+
+# LinkMatch Pro AI fields
+LINKMATCH_AI_PROPERTIES = [
+	"linkmatch_ai_decision_maker",
+	"linkmatch_ai_engagement_score",
+	"linkmatch_ai_best_contact_time",
+	"linkmatch_ai_communication_style",
+	"linkmatch_ai_buying_signals",
+	"linkmatch_ai_pain_points",
+	"linkmatch_custom_prompt_1",  # Configurable custom prompts
+	"linkmatch_custom_prompt_2",
+	"linkmatch_custom_prompt_3"
+]
+
+# Separator for comma-separated LinkMatch AI fields (absorbs surrounding spaces)
+_CSV_SPLIT = re.compile(r"\s*,\s*")
+
+# bulk_import looks contacts up by crm_id; auto_connect's NOT EXISTS probes
+# recent connection requests per contact
+LINKMATCH_INDEXES = [
+	"CREATE UNIQUE INDEX IF NOT EXISTS idx_contacts_crm_id ON contacts (crm_id)",
+	"""
+	CREATE INDEX IF NOT EXISTS idx_linkedin_actions_contact_action
+	ON linkedin_actions (contact_id, action_type, created_at DESC)
+	WHERE action_type = 'connection_request'
+	"""
+]
+
+
+def _create_linkmatch_indexes() -> None:
+	"""Index the crm_id and linkedin_actions lookups used by import/auto-connect"""
+	try:
+		with engine.begin() as conn:
+			for statement in LINKMATCH_INDEXES:
+				conn.execute(text(statement))
+	except SQLAlchemyError as e:
+		logger.error(f"Error creating LinkMatch indexes: {str(e)}")
+
+
+# Runs once per process on import; IF NOT EXISTS makes repeats cheap
+_create_linkmatch_indexes()
+
+# Fields copied into the Sales Angel contacts table on import
+CONTACT_PROPERTIES = ["email", "firstname", "lastname", "company", "phone", "linkedin_profile_url"]
+
 
 class LinkedInProfile(BaseModel):
 	"""LinkedIn profile data from LinkMatch"""
@@ -65,54 +230,148 @@ class LinkMatchAIInsights(BaseModel):
 # CORE LINKMATCH DATA RETRIEVAL
 # ============================================================================
 	
+async def batch_read_contacts(ids: List[str], properties: List[str]) -> Dict[str, Dict]:
+	"""
+	Read many HubSpot contacts via /batch/read
+	Chunks of 100 IDs are posted concurrently; returns {contact_id: properties}
+	"""
+	url = "/crm/v3/objects/contacts/batch/read"
+	
+	chunks = [ids[i:i + HUBSPOT_BATCH_READ_LIMIT] for i in range(0, len(ids), HUBSPOT_BATCH_READ_LIMIT)]
+	
+	async def read_chunk(chunk: List[str]) -> List[Dict]:
+		payload = {
+			"properties": properties,
+			"inputs": [{"id": cid} for cid in chunk]
+		}
+		response = await _hubspot_request("POST", url, json=payload, timeout=30.0)
+		response.raise_for_status()
+		return _json_loads(response.content)["results"]
+	
+	pages = await asyncio.gather(*[read_chunk(chunk) for chunk in chunks])
+	
+	return {r["id"]: r["properties"] for page in pages for r in page}
+
+
+def _cache_get(cache: Dict[str, tuple], contact_id: str):
+	"""Return a cached value for contact_id, or None if missing/expired"""
+	entry = cache.get(contact_id)
+	if entry is None:
+		return None
+	expires_at, value = entry
+	if expires_at < time.monotonic():
+		cache.pop(contact_id, None)
+		return None
+	return value
+
+
+def _cache_put(cache: Dict[str, tuple], contact_id: str, value) -> None:
+	"""Store value for contact_id, evicting the oldest entry when full"""
+	cache.pop(contact_id, None)
+	if len(cache) >= CACHE_MAXSIZE:
+		cache.pop(next(iter(cache)))
+	cache[contact_id] = (time.monotonic() + CACHE_TTL_SECONDS, value)
+
+
+def invalidate_contact(contact_id: str) -> None:
+	"""Drop cached LinkMatch data for a contact after a state-changing write"""
+	_profile_cache.pop(contact_id, None)
+	_insights_cache.pop(contact_id, None)
+
+
+def _profile_from_props(props: Dict) -> LinkedInProfile:
+	"""Build a LinkedInProfile from HubSpot contact properties"""
+	return LinkedInProfile(
+		linkedin_url=props.get("linkedin_profile_url"),
+		headline=props.get("linkedin_headline"),
+		bio=props.get("linkedin_bio"),
+		connections=int(props.get("linkedin_connections_count", 0)) if props.get("linkedin_connections_count") else None,
+		posts_count=int(props.get("linkedin_posts_count", 0)) if props.get("linkedin_posts_count") else None,
+		last_activity=props.get("linkedin_last_activity_date"),
+		connection_status=props.get("linkmatch_connection_status") or "not_connected",
+		verified_email=props.get("linkmatch_verified_email")
+	)
+
+
+def _split_csv(value: Optional[str]) -> List[str]:
+	"""Split a comma-separated HubSpot field, trimming whitespace in the regex"""
+	if not value:
+		return []
+	return [s for s in _CSV_SPLIT.split(value.strip()) if s]
+
+
+def _insights_from_props(props: Dict) -> LinkMatchAIInsights:
+	"""Build LinkMatchAIInsights from HubSpot contact properties"""
+	# Parse buying signals and pain points (stored as comma-separated)
+	buying_signals = _split_csv(props.get("linkmatch_ai_buying_signals"))
+	pain_points = _split_csv(props.get("linkmatch_ai_pain_points"))
+	
+	# Custom insights
+	custom_insights = [
+		props.get("linkmatch_custom_prompt_1"),
+		props.get("linkmatch_custom_prompt_2"),
+		props.get("linkmatch_custom_prompt_3")
+	]
+	custom_insights = [i for i in custom_insights if i]  # Filter None values
+	
+	return LinkMatchAIInsights(
+		is_decision_maker=props.get("linkmatch_ai_decision_maker") == "true",
+		engagement_score=int(props.get("linkmatch_ai_engagement_score") or 0),
+		best_time_to_contact=props.get("linkmatch_ai_best_contact_time"),
+		communication_style=props.get("linkmatch_ai_communication_style"),
+		buying_signals=buying_signals,
+		pain_points_detected=pain_points,
+		custom_insights=custom_insights
+	)
+
+
+def _contact_from_props(props: Dict) -> Dict:
+	"""Map HubSpot contact properties to Sales Angel contact fields"""
+	return {
+		"name": f"{props.get('firstname') or ''} {props.get('lastname') or ''}".strip(),
+		"email": props.get("email"),
+		"company": props.get("company"),
+		"phone": props.get("phone"),
+		"linkedin_url": props.get("linkedin_profile_url")
+	}
+
+
+def _contact_rows(contact_ids: List[str], props_by_id: Dict[str, Dict]) -> List[Dict]:
+	"""Build contacts INSERT params for many HubSpot contacts column-wise"""
+	if not contact_ids:
+		return []
+	
+	df = pd.DataFrame.from_dict(props_by_id, orient="index").reindex(index=contact_ids, columns=CONTACT_PROPERTIES)
+	df["name"] = (df["firstname"].fillna("") + " " + df["lastname"].fillna("")).str.strip()
+	df = df.rename(columns={"linkedin_profile_url": "linkedin"})
+	df["cid"] = df.index
+	df = df[["cid", "name", "email", "company", "phone", "linkedin"]].astype(object)
+	return df.where(df.notna(), None).to_dict("records")
+
+
 async def get_linkedin_profile_from_hubspot(contact_id: str) -> LinkedInProfile:
 	"""
 	Retrieve LinkedIn profile data synced by LinkMatch
 	LinkMatch → HubSpot → Sales Angel
 	"""
-	url = f"{HUBSPOT_API_BASE}/crm/v3/objects/contacts/{contact_id}"
+	cached = _cache_get(_profile_cache, contact_id)
+	if cached is not None:
+		return cached
 	
-	headers = {
-		"Authorization": f"Bearer {HUBSPOT_API_KEY}",
-		"Content-Type": "application/json"
-	}
+	url = f"/crm/v3/objects/contacts/{contact_id}"
 	
-	# LinkMatch Pro custom fields in HubSpot
-	params = {
-		"properties": [
-			"linkedin_profile_url",
-			"linkedin_headline",
-			"linkedin_bio",
-			"linkedin_connections_count",
-			"linkedin_posts_count",
-			"linkedin_last_activity_date",
-			"linkmatch_connection_status",
-			"linkmatch_verified_email",
-			"linkmatch_sync_date"
-		]
-	}
+	params = {"properties": LINKEDIN_PROFILE_PROPERTIES}
 	
 	try:
-		async with httpx.AsyncClient(timeout=15.0) as client:
-			response = await client.get(url, headers=headers, params=params)
-			response.raise_for_status()
-			
-			props = response.json()["properties"]
-			
-			profile = LinkedInProfile(
-				linkedin_url=props.get("linkedin_profile_url"),
-				headline=props.get("linkedin_headline"),
-				bio=props.get("linkedin_bio"),
-				connections=int(props.get("linkedin_connections_count", 0)) if props.get("linkedin_connections_count") else None,
-				posts_count=int(props.get("linkedin_posts_count", 0)) if props.get("linkedin_posts_count") else None,
-				last_activity=props.get("linkedin_last_activity_date"),
-				connection_status=props.get("linkmatch_connection_status", "not_connected"),
-				verified_email=props.get("linkmatch_verified_email")
-			)
-			
-			logger.info(f"Retrieved LinkedIn profile for contact {contact_id}")
-			return profile
+		response = await _hubspot_request("GET", url, params=params)
+		response.raise_for_status()
+		
+		profile = _profile_from_props(_json_loads(response.content)["properties"])
+		_cache_put(_profile_cache, contact_id, profile)
 		
+		logger.info(f"Retrieved LinkedIn profile for contact {contact_id}")
+		return profile
+	
 	except httpx.HTTPError as e:
 		logger.error(f"HubSpot API error retrieving LinkedIn profile: {str(e)}")
 		return LinkedInProfile(connection_status="error")
@@ -126,59 +385,23 @@ async def get_linkmatch_ai_insights(contact_id: str) -> LinkMatchAIInsights:
 	Retrieve AI-powered insights from LinkMatch Pro
 	Uses custom prompts configured in LinkMatch Pro
 	"""
-	url = f"{HUBSPOT_API_BASE}/crm/v3/objects/contacts/{contact_id}"
+	cached = _cache_get(_insights_cache, contact_id)
+	if cached is not None:
+		return cached
 	
-	headers = {
-		"Authorization": f"Bearer {HUBSPOT_API_KEY}",
-		"Content-Type": "application/json"
-	}
+	url = f"/crm/v3/objects/contacts/{contact_id}"
 	
-	# LinkMatch Pro AI fields
-	params = {
-		"properties": [
-			"linkmatch_ai_decision_maker",
-			"linkmatch_ai_engagement_score",
-			"linkmatch_ai_best_contact_time",
-			"linkmatch_ai_communication_style",
-			"linkmatch_ai_buying_signals",
-			"linkmatch_ai_pain_points",
-			"linkmatch_custom_prompt_1",  # Configurable custom prompts
-			"linkmatch_custom_prompt_2",
-			"linkmatch_custom_prompt_3"
-		]
-	}
+	params = {"properties": LINKMATCH_AI_PROPERTIES}
 	
 	try:
-		async with httpx.AsyncClient(timeout=15.0) as client:
-			response = await client.get(url, headers=headers, params=params)
-			response.raise_for_status()
-			
-			props = response.json()["properties"]
-			
-			# Parse buying signals and pain points (stored as comma-separated)
-			buying_signals = props.get("linkmatch_ai_buying_signals", "").split(",") if props.get("linkmatch_ai_buying_signals") else []
-			pain_points = props.get("linkmatch_ai_pain_points", "").split(",") if props.get("linkmatch_ai_pain_points") else []
-			
-			# Custom insights
-			custom_insights = [
-				props.get("linkmatch_custom_prompt_1"),
-				props.get("linkmatch_custom_prompt_2"),
-				props.get("linkmatch_custom_prompt_3")
-			]
-			custom_insights = [i for i in custom_insights if i]  # Filter None values
-			
-			insights = LinkMatchAIInsights(
-				is_decision_maker=props.get("linkmatch_ai_decision_maker") == "true",
-				engagement_score=int(props.get("linkmatch_ai_engagement_score", 0)),
-				best_time_to_contact=props.get("linkmatch_ai_best_contact_time"),
-				communication_style=props.get("linkmatch_ai_communication_style"),
-				buying_signals=[s.strip() for s in buying_signals if s.strip()],
-				pain_points_detected=[p.strip() for p in pain_points if p.strip()],
-				custom_insights=custom_insights
-			)
-			
-			logger.info(f"Retrieved AI insights for contact {contact_id}")
-			return insights
+		response = await _hubspot_request("GET", url, params=params)
+		response.raise_for_status()
+		
+		insights = _insights_from_props(_json_loads(response.content)["properties"])
+		_cache_put(_insights_cache, contact_id, insights)
+		
+		logger.info(f"Retrieved AI insights for contact {contact_id}")
+		return insights
 		
 	except Exception as e:
 		logger.error(f"Error retrieving AI insights: {str(e)}")
@@ -195,6 +418,87 @@ async def get_linkmatch_ai_insights(contact_id: str) -> LinkMatchAIInsights:
 # LINKEDIN CONNECTION MANAGEMENT
 # ============================================================================
 	
+def _write_actions(batch: List[Dict]) -> bool:
+	"""Insert a batch of linkedin_actions rows in one transaction; False if it failed"""
+	try:
+		with engine.begin() as conn:
+			conn.execute(
+				text("""
+					INSERT INTO linkedin_actions 
+					(contact_id, action_type, message, status, created_at)
+					VALUES (:cid, :action_type, :msg, :status, NOW())
+				"""),
+				batch
+			)
+		return True
+	except SQLAlchemyError as e:
+		logger.error(f"Error logging {len(batch)} LinkedIn actions: {str(e)}")
+		return False
+		
+		
+async def _action_flusher() -> None:
+	"""Drain the action queue, writing one batch per size/time window"""
+	loop = asyncio.get_running_loop()
+	batch: List[Dict] = []
+	try:
+		while True:
+			batch.append(await _action_queue.get())
+			deadline = loop.time() + ACTION_FLUSH_INTERVAL
+			while len(batch) < ACTION_FLUSH_BATCH:
+				timeout = deadline - loop.time()
+				if timeout <= 0:
+					break
+				try:
+					batch.append(await asyncio.wait_for(_action_queue.get(), timeout))
+				except asyncio.TimeoutError:
+					break
+			# Keep the batch until it is written; callers already reported success
+			while not _write_actions(batch):
+				await asyncio.sleep(ACTION_RETRY_DELAY)
+			for _ in batch:
+				_action_queue.task_done()
+			batch = []
+	finally:
+		# Cancelled at shutdown: one last attempt for rows already off the queue
+		if batch and not _write_actions(batch):
+			logger.error(f"Dropped {len(batch)} LinkedIn actions at shutdown: {_json_dumps(batch)}")
+			
+			
+def _ensure_action_flusher() -> None:
+	"""Start the background writer if it is not already running"""
+	global _action_flusher_task
+	if _action_flusher_task is None or _action_flusher_task.done():
+		_action_flusher_task = asyncio.create_task(_action_flusher())
+		
+		
+async def flush_linkedin_actions(timeout: float = ACTION_FLUSH_TIMEOUT) -> bool:
+	"""
+	Wait until every queued action row has been written by the background
+	writer (end of a cron run / shutdown). False if rows are still pending
+	after `timeout` seconds, e.g. while the database is unreachable.
+	"""
+	if _action_queue.empty() and (_action_flusher_task is None or _action_flusher_task.done()):
+		return True
+	_ensure_action_flusher()
+	try:
+		await asyncio.wait_for(_action_queue.join(), timeout)
+		return True
+	except asyncio.TimeoutError:
+		logger.warning(f"LinkedIn action log not flushed after {timeout}s; {_action_queue.qsize()} rows still queued")
+		return False
+		
+		
+async def _log_action(contact_id: str, action_type: str, message: Optional[str] = None) -> None:
+	"""Queue a linkedin_actions row for the background writer"""
+	_ensure_action_flusher()
+	await _action_queue.put({
+		"cid": contact_id,
+		"action_type": action_type,
+		"msg": message,
+		"status": "queued"
+	})
+	
+	
 async def check_linkedin_connection_status(contact_id: str) -> str:
 	"""
 	Check current LinkedIn connection status
@@ -204,13 +508,14 @@ async def check_linkedin_connection_status(contact_id: str) -> str:
 	return profile.connection_status
 
 
-async def request_linkedin_connection(contact_id: str, message: Optional[str] = None) -> bool:
+async def request_linkedin_connection(contact_id: str, message: Optional[str] = None, *, known_status: Optional[str] = None) -> bool:
 	"""
 	Queue LinkedIn connection request via LinkMatch
 	Method: Update HubSpot field that LinkMatch monitors
+	Pass known_status when the caller already fetched it to skip the read
 	"""
 	# First check if already connected
-	status = await check_linkedin_connection_status(contact_id)
+	status = known_status or await check_linkedin_connection_status(contact_id)
 	
 	if status == "connected":
 		logger.info(f"Contact {contact_id} already connected - skipping")
@@ -220,12 +525,7 @@ async def request_linkedin_connection(contact_id: str, message: Optional[str] =
 		logger.info(f"Connection request already pending for {contact_id}")
 		return True
 	
-	url = f"{HUBSPOT_API_BASE}/crm/v3/objects/contacts/{contact_id}"
-	
-	headers = {
-		"Authorization": f"Bearer {HUBSPOT_API_KEY}",
-		"Content-Type": "application/json"
-	}
+	url = f"/crm/v3/objects/contacts/{contact_id}"
 	
 	# Update HubSpot fields to trigger LinkMatch action
 	payload = {
@@ -238,48 +538,36 @@ async def request_linkedin_connection(contact_id: str, message: Optional[str] =
 	}
 	
 	try:
-		async with httpx.AsyncClient(timeout=15.0) as client:
-			response = await client.patch(url, headers=headers, json=payload)
-			response.raise_for_status()
-			
-			logger.info(f"LinkedIn connection request queued for contact {contact_id}")
+		response = await _hubspot_request("PATCH", url, json=payload)
+		response.raise_for_status()
+		
+		logger.info(f"LinkedIn connection request queued for contact {contact_id}")
+		invalidate_contact(contact_id)
+		
+		# Log to database (batched by the background writer)
+		await _log_action(contact_id, "connection_request")
 			
-			# Log to database
-			with engine.begin() as conn:
-				conn.execute(
-					text("""
-						INSERT INTO linkedin_actions 
-						(contact_id, action_type, status, created_at)
-						VALUES (:cid, 'connection_request', 'queued', NOW())
-					"""),
-					{"cid": contact_id}
-				)
-				
-			return True
+		return True
 		
 	except Exception as e:
 		logger.error(f"Error queueing connection request: {str(e)}")
 		return False
 	
 	
-async def send_linkedin_message(contact_id: str, message: str) -> bool:
+async def send_linkedin_message(contact_id: str, message: str, *, known_status: Optional[str] = None) -> bool:
 	"""
 	Send LinkedIn message via LinkMatch
 	Requires existing connection
+	Pass known_status when the caller already fetched it to skip the read
 	"""
 	# Check connection status
-	status = await check_linkedin_connection_status(contact_id)
+	status = known_status or await check_linkedin_connection_status(contact_id)
 	
 	if status != "connected":
 		logger.warning(f"Cannot send message - not connected to {contact_id}")
 		return False
 	
-	url = f"{HUBSPOT_API_BASE}/crm/v3/objects/contacts/{contact_id}"
-	
-	headers = {
-		"Authorization": f"Bearer {HUBSPOT_API_KEY}",
-		"Content-Type": "application/json"
-	}
+	url = f"/crm/v3/objects/contacts/{contact_id}"
 	
 	payload = {
 		"properties": {
@@ -291,24 +579,16 @@ async def send_linkedin_message(contact_id: str, message: str) -> bool:
 	}
 	
 	try:
-		async with httpx.AsyncClient(timeout=15.0) as client:
-			response = await client.patch(url, headers=headers, json=payload)
-			response.raise_for_status()
-			
-			logger.info(f"LinkedIn message queued for contact {contact_id}")
+		response = await _hubspot_request("PATCH", url, json=payload)
+		response.raise_for_status()
+		
+		logger.info(f"LinkedIn message queued for contact {contact_id}")
+		invalidate_contact(contact_id)
+		
+		# Log to database (batched by the background writer)
+		await _log_action(contact_id, "message_sent", message[:500])  # Truncate if needed
 			
-			# Log to database
-			with engine.begin() as conn:
-				conn.execute(
-					text("""
-						INSERT INTO linkedin_actions 
-						(contact_id, action_type, message, status, created_at)
-						VALUES (:cid, 'message_sent', :msg, 'queued', NOW())
-					"""),
-					{"cid": contact_id, "msg": message[:500]}  # Truncate if needed
-				)
-				
-			return True
+		return True
 		
 	except Exception as e:
 		logger.error(f"Error queueing LinkedIn message: {str(e)}")
@@ -319,6 +599,70 @@ async def send_linkedin_message(contact_id: str, message: str) -> bool:
 # BULK OPERATIONS
 # ============================================================================
 	
+async def _import_contact_page(contact_ids: List[str]) -> int:
+	"""Insert the not-yet-imported contacts from one search page; returns count"""
+	# Check which contacts already exist in one query
+	with engine.connect() as conn:
+		existing = pd.read_sql(
+			text("SELECT crm_id FROM contacts WHERE crm_id = ANY(:cids)"),
+			conn,
+			params={"cids": contact_ids}
+		)
+	
+	ids = pd.Index(contact_ids)
+	new_ids = ids[~ids.isin(existing["crm_id"])].tolist()
+	
+	# Fetch full contact data in batches of 100 instead of one GET per contact
+	props_by_id = await batch_read_contacts(new_ids, CONTACT_PROPERTIES) if new_ids else {}
+	
+	rows = _contact_rows(new_ids, props_by_id)
+	
+	# Import to Sales Angel database (a list of params runs as executemany)
+	if not rows:
+		return 0
+	
+	with engine.begin() as conn:
+		result = conn.execute(
+			text("""
+				INSERT INTO contacts 
+				(crm_id, name, email, company, phone, linkedin_url, source, created_at)
+				VALUES (:cid, :name, :email, :company, :phone, :linkedin, 'linkmatch', NOW())
+				ON CONFLICT DO NOTHING
+			"""),
+			rows
+		)
+	
+	# Rows skipped by ON CONFLICT DO NOTHING are not counted
+	return result.rowcount
+
+
+async def _search_contact_pages(payload: Dict, limit: int, queue: asyncio.Queue) -> None:
+	"""Page through the HubSpot search with the `after` cursor, queueing ID lists"""
+	url = "/crm/v3/objects/contacts/search"
+	fetched = 0
+	try:
+		while fetched < limit:
+			payload["limit"] = min(HUBSPOT_SEARCH_PAGE_SIZE, limit - fetched)
+			
+			response = await _hubspot_request("POST", url, json=payload, timeout=30.0)
+			response.raise_for_status()
+			data = _json_loads(response.content)
+			
+			contact_ids = [r["id"] for r in data["results"]]
+			fetched += len(contact_ids)
+			if contact_ids:
+				await queue.put(contact_ids)
+			
+			after = data.get("paging", {}).get("next", {}).get("after")
+			if not after or not contact_ids:
+				break
+			payload["after"] = after
+	finally:
+		# End-of-pages marker; skipped when cancelled since nobody is reading
+		if not asyncio.current_task().cancelling():
+			await queue.put(None)
+
+
 async def bulk_import_linkedin_contacts(search_url: Optional[str] = None, limit: int = 500):
 	"""
 	Import contacts from LinkMatch bulk export
@@ -328,16 +672,12 @@ async def bulk_import_linkedin_contacts(search_url: Optional[str] = None, limit:
 	1. User performs LinkedIn search or Sales Navigator search
 	2. LinkMatch Pro exports to HubSpot (max 500)
 	3. This function detects new imports and enriches them
+	
+	Search pages are imported as they arrive; the small queue pauses
+	pagination while inserts catch up, so memory stays at a couple of pages
 	"""
 	logger.info("Starting bulk import from LinkMatch")
 	
-	url = f"{HUBSPOT_API_BASE}/crm/v3/objects/contacts/search"
-	
-	headers = {
-		"Authorization": f"Bearer {HUBSPOT_API_KEY}",
-		"Content-Type": "application/json"
-	}
-	
 	# Query for recently added contacts from LinkMatch
 	payload = {
 		"filterGroups": [{
@@ -354,67 +694,33 @@ async def bulk_import_linkedin_contacts(search_url: Optional[str] = None, limit:
 				}
 			]
 		}],
-		"properties": ["id", "email", "firstname", "lastname", "company"],
-		"limit": limit
+		"properties": ["id", "email", "firstname", "lastname", "company"]
 	}
 	
 	try:
-		async with httpx.AsyncClient(timeout=30.0) as client:
-			response = await client.post(url, headers=headers, json=payload)
-			response.raise_for_status()
-			
-			results = response.json()["results"]
-			contact_ids = [r["id"] for r in results]
-			
-			logger.info(f"Found {len(contact_ids)} new contacts from LinkMatch")
+		queue: asyncio.Queue = asyncio.Queue(maxsize=2)
+		search = asyncio.create_task(_search_contact_pages(payload, limit, queue))
+		
+		total_found = 0
+		imported = 0
+		try:
+			while (contact_ids := await queue.get()) is not None:
+				total_found += len(contact_ids)
+				imported += await _import_contact_page(contact_ids)
 			
-			# Import to Sales Angel database
-			imported = 0
-			for contact_id in contact_ids:
-				try:
-					# Check if already exists
-					with engine.connect() as conn:
-						exists = conn.execute(
-							text("SELECT id FROM contacts WHERE crm_id = :cid"),
-							{"cid": contact_id}
-						).fetchone()
-						
-					if not exists:
-						# Get full contact data
-						contact_data = await get_full_contact_data(contact_id)
-						
-						# Insert to database
-						with engine.begin() as conn:
-							conn.execute(
-								text("""
-									INSERT INTO contacts 
-									(crm_id, name, email, company, phone, linkedin_url, source, created_at)
-									VALUES (:cid, :name, :email, :company, :phone, :linkedin, 'linkmatch', NOW())
-								"""),
-								{
-									"cid": contact_id,
-									"name": contact_data.get("name"),
-									"email": contact_data.get("email"),
-									"company": contact_data.get("company"),
-									"phone": contact_data.get("phone"),
-									"linkedin": contact_data.get("linkedin_url")
-								}
-							)
-							
-						imported += 1
-						logger.info(f"Imported contact {contact_id}")
-						
-				except Exception as e:
-					logger.error(f"Error importing contact {contact_id}: {str(e)}")
-					continue
-				
-			return {
-				"status": "success",
-				"total_found": len(contact_ids),
-				"imported": imported,
-				"message": f"Imported {imported} new contacts from LinkMatch"
-			}
+			await search  # surface search errors
+		finally:
+			search.cancel()
 		
+		logger.info(f"Found {total_found} new contacts from LinkMatch, imported {imported}")
+		
+		return {
+			"status": "success",
+			"total_found": total_found,
+			"imported": imported,
+			"message": f"Imported {imported} new contacts from LinkMatch"
+		}
+	
 	except Exception as e:
 		logger.error(f"Error in bulk import: {str(e)}")
 		return {"status": "error", "error": str(e)}
@@ -422,21 +728,11 @@ async def bulk_import_linkedin_contacts(search_url: Optional[str] = None, limit:
 	
 async def get_full_contact_data(contact_id: str) -> Dict:
 	"""Retrieve complete contact data from HubSpot"""
-	url = f"{HUBSPOT_API_BASE}/crm/v3/objects/contacts/{contact_id}"
-	headers = {"Authorization": f"Bearer {HUBSPOT_API_KEY}"}
+	url = f"/crm/v3/objects/contacts/{contact_id}"
 	
 	try:
-		async with httpx.AsyncClient() as client:
-			response = await client.get(url, headers=headers)
-			props = response.json()["properties"]
-			
-			return {
-				"name": f"{props.get('firstname', '')} {props.get('lastname', '')}".strip(),
-				"email": props.get("email"),
-				"company": props.get("company"),
-				"phone": props.get("phone"),
-				"linkedin_url": props.get("linkedin_profile_url")
-			}
+		response = await _hubspot_request("GET", url)
+		return _contact_from_props(_json_loads(response.content)["properties"])
 	except:
 		return {}
 	
@@ -450,62 +746,60 @@ async def enrich_with_linkmatch_ai(contact_id: str) -> Dict:
 	Enhance Sales Angel enrichment with LinkMatch Pro AI insights
 	Combines Profile Builder (Module 2) with LinkMatch AI
 	"""
-	# Get LinkMatch data
-	linkedin_profile = await get_linkedin_profile_from_hubspot(contact_id)
-	ai_insights = await get_linkmatch_ai_insights(contact_id)
-	
-	# Get existing Sales Angel profile
+	# Get LinkMatch data (profile + AI fields in a single HubSpot read)
 	try:
-		with engine.connect() as conn:
-			result = conn.execute(
-				text("SELECT profile_json FROM profiles WHERE contact_id = :cid"),
-				{"cid": contact_id}
-			).fetchone()
-			
-			if result:
-				existing_profile = result[0]
-			else:
-				existing_profile = {}
-	except:
-		existing_profile = {}
-		
-	# Merge data
-	enhanced_profile = existing_profile.copy()
-	
-	# Add LinkMatch AI insights to sales_talking_points
-	if "sales_talking_points" not in enhanced_profile:
-		enhanced_profile["sales_talking_points"] = {}
-		
-	enhanced_profile["sales_talking_points"]["linkmatch_buying_signals"] = ai_insights.buying_signals
-	enhanced_profile["sales_talking_points"]["linkmatch_pain_points"] = ai_insights.pain_points_detected
-	enhanced_profile["sales_talking_points"]["linkmatch_engagement_score"] = ai_insights.engagement_score
-	enhanced_profile["sales_talking_points"]["linkmatch_best_time"] = ai_insights.best_time_to_contact
-	
-	# Add to personality section
-	if "mbti_interpretation" not in enhanced_profile:
-		enhanced_profile["mbti_interpretation"] = {}
-		
-	enhanced_profile["mbti_interpretation"]["linkmatch_communication_style"] = ai_insights.communication_style
-	
-	# Add decision maker flag
-	enhanced_profile["linkmatch_is_decision_maker"] = ai_insights.is_decision_maker
-	
-	# Add custom AI insights
-	enhanced_profile["linkmatch_custom_insights"] = ai_insights.custom_insights
+		contacts = await batch_read_contacts([contact_id], LINKEDIN_PROFILE_PROPERTIES + LINKMATCH_AI_PROPERTIES)
+		props = contacts.get(contact_id, {})
+	except Exception as e:
+		logger.error(f"Error retrieving LinkMatch data: {str(e)}")
+		props = {}
+	
+	linkedin_profile = _profile_from_props(props)
+	ai_insights = _insights_from_props(props)
+	
+	# Only the LinkMatch keys are sent; the merge into the stored profile
+	# happens server-side so the existing blob never round-trips through Python
+	patch = {
+		"sales_talking_points": {
+			"linkmatch_buying_signals": ai_insights.buying_signals,
+			"linkmatch_pain_points": ai_insights.pain_points_detected,
+			"linkmatch_engagement_score": ai_insights.engagement_score,
+			"linkmatch_best_time": ai_insights.best_time_to_contact,
+		},
+		"mbti_interpretation": {
+			"linkmatch_communication_style": ai_insights.communication_style,
+		},
+		"linkmatch_is_decision_maker": ai_insights.is_decision_maker,
+		"linkmatch_custom_insights": ai_insights.custom_insights,
+	}
+	enhanced_profile = patch
 	
 	# Update database
 	try:
 		with engine.begin() as conn:
-			conn.execute(
+			result = conn.execute(
 				text("""
 					UPDATE profiles 
-					SET profile_json = :profile, 
+					SET profile_json = COALESCE(profile_json, '{}'::jsonb)
+							|| CAST(:patch AS jsonb)
+							|| jsonb_build_object(
+								'sales_talking_points',
+								COALESCE(profile_json -> 'sales_talking_points', '{}'::jsonb)
+									|| (CAST(:patch AS jsonb) -> 'sales_talking_points'),
+								'mbti_interpretation',
+								COALESCE(profile_json -> 'mbti_interpretation', '{}'::jsonb)
+									|| (CAST(:patch AS jsonb) -> 'mbti_interpretation')
+							),
 						linkmatch_enriched = TRUE,
 						linkmatch_enriched_at = NOW()
 					WHERE contact_id = :cid
+					RETURNING profile_json
 				"""),
-				{"profile": json.dumps(enhanced_profile), "cid": contact_id}
-			)
+				{"patch": _json_dumps(patch), "cid": contact_id}
+			).fetchone()
+			
+			if result:
+				enhanced_profile = result[0]
 	except Exception as e:
 		logger.error(f"Error updating profile with LinkMatch data: {str(e)}")
 		
@@ -544,25 +838,41 @@ async def auto_connect_high_score_leads():
 				""")
 			).fetchall()
 			
-		connected = 0
-		for row in results:
-			contact_id = str(row[0])
-			
-			# Check LinkMatch status
-			status = await check_linkedin_connection_status(contact_id)
-			
-			if status == "not_connected":
+		contact_ids = [str(row[0]) for row in results]
+		
+		# Prefetch profile + AI fields for every lead in one batch/read and
+		# seed the caches, so the per-lead checks below do not hit HubSpot
+		props_by_id = await batch_read_contacts(contact_ids, LINKEDIN_PROFILE_PROPERTIES + LINKMATCH_AI_PROPERTIES)
+		for contact_id, props in props_by_id.items():
+			_cache_put(_profile_cache, contact_id, _profile_from_props(props))
+			_cache_put(_insights_cache, contact_id, _insights_from_props(props))
+		
+		sem = asyncio.Semaphore(AUTO_CONNECT_CONCURRENCY)
+		
+		async def _process_lead(contact_id: str) -> bool:
+			async with sem:
+				# Check LinkMatch status
+				status = await check_linkedin_connection_status(contact_id)
+				
+				if status != "not_connected":
+					return False
+				
 				# Generate personalized message using AI insights
 				insights = await get_linkmatch_ai_insights(contact_id)
 				
 				message = "I'd like to connect!"
 				if insights.custom_insights:
 					message = insights.custom_insights[0][:300]  # Use first custom insight
-					
-				success = await request_linkedin_connection(contact_id, message)
-				if success:
-					connected += 1
-					
+				
+				return await request_linkedin_connection(contact_id, message, known_status=status)
+		
+		outcomes = await asyncio.gather(*[_process_lead(cid) for cid in contact_ids])
+		connected = sum(outcomes)
+		
+		# Wait for this run's action log to be written, including rows the
+		# background writer has already pulled off the queue
+		await flush_linkedin_actions()
+		
 		logger.info(f"Auto-connected {connected} high-score leads")
 		return {"status": "success", "connected": connected}
 	
@@ -581,6 +891,37 @@ import asyncio
 router = APIRouter()
 
 
+async def close_linkmatch() -> None:
+	"""
+	Write out queued linkedin_actions rows, stop the background writer and
+	release pooled HubSpot connections. Call once when the process is done
+	with this module: app shutdown, or the end of a script's asyncio.run().
+	"""
+	await flush_linkedin_actions()
+	if _action_flusher_task is not None:
+		_action_flusher_task.cancel()
+		try:
+			await _action_flusher_task
+		except asyncio.CancelledError:
+			pass
+	
+	# Anything left (flush timed out) gets one direct attempt before exit
+	leftover = []
+	while not _action_queue.empty():
+		leftover.append(_action_queue.get_nowait())
+	if leftover and not _write_actions(leftover):
+		logger.error(f"Dropped {len(leftover)} LinkedIn actions at shutdown: {_json_dumps(leftover)}")
+	
+	await _client.aclose()
+
+
+@asynccontextmanager
+async def linkmatch_lifespan(app):
+	"""Lifespan for an app that mounts this router: FastAPI(lifespan=linkmatch_lifespan)"""
+	yield
+	await close_linkmatch()
+
+
 @router.get("/api/linkmatch/profile/{contact_id}")
 async def linkmatch_profile_endpoint(contact_id: str):
 	"""Get LinkedIn profile data from LinkMatch"""
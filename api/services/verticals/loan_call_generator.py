@@ -6,13 +6,29 @@ Generates 3 personalized 30-45 second call openers with objection handling
 Returns strict JSON for safe parsing and database storage
 """
 
+import asyncio
 import json
-import csv
+import re
 import sys
 import os
-from typing import Dict, Any, Optional
+from typing import Dict, Any, Optional, Tuple
+import pandas as pd
 from dotenv import load_dotenv
-from openai import OpenAI
+from openai import AsyncOpenAI, OpenAI
+
+# orjson parses model output and writes JSONL records faster than the
+# stdlib; fall back to json when it is not installed
+try:
+    import orjson
+    _json_loads = orjson.loads
+
+    def _jsonl_line(record: Dict[str, Any]) -> bytes:
+        return orjson.dumps(record) + b"\n"
+except ImportError:
+    _json_loads = json.loads
+
+    def _jsonl_line(record: Dict[str, Any]) -> bytes:
+        return (json.dumps(record, ensure_ascii=False) + "\n").encode("utf-8")
 
 # Load environment variables
 load_dotenv()
@@ -24,6 +40,7 @@ try:
         print("❌ ERROR: OPENAI_API_KEY not found in .env")
         sys.exit(1)
     client = OpenAI(api_key=api_key)
+    async_client = AsyncOpenAI(api_key=api_key)
 except Exception as e:
     print(f"❌ ERROR: {e}")
     sys.exit(1)
@@ -32,24 +49,25 @@ except Exception as e:
 # CONFIGURATION
 # ============================================================================
 
-MODEL = "gpt-4"
-BANNED_TERMS = [
+MODEL = "gpt-4o-mini"
+BANNED_TERMS = (
     "fintech", "software", "platform", "app", "digital tool", 
     "AI", "SaaS", "automation", "dashboard", "analytics",
     "CRM", "workflow", "integration", "database"
-]
-MAX_REGENERATIONS = 2
+)
+# One case-insensitive pass over the response for all banned terms, whole words and plurals
+_BANNED_RE = re.compile(r"\b(?:" + "|".join(map(re.escape, BANNED_TERMS)) + r")s?\b", re.IGNORECASE)
+MAX_REGENERATIONS = 1  # structured output rules out malformed JSON; retries are for banned terms
+BATCH_CONCURRENCY = 20  # contacts in flight at once in process_csv_to_jsonl
+REQUIRED_COLUMNS = {"name", "company", "title"}
 
 # ============================================================================
 # PROMPT BUILDER
 # ============================================================================
 
-def _build_prompt(contact: Dict[str, Any], provider_name: Optional[str] = None) -> str:
-    """Builds tightly-scoped prompt for cold-call scripts with strict JSON output"""
-
-    provider = provider_name or "our team"
-
-    return f"""
+# Fixed instructions go in the system message so the identical prefix is
+# served from OpenAI's prompt cache; only the contact block changes per call
+SYSTEM_PROMPT = """
 You are writing three concise cold-call OPENERS (30-45 seconds each, 60-85 words).
 Return STRICT JSON ONLY.
 
@@ -62,7 +80,7 @@ Each variant must have:
 PHONE STYLE (CRITICAL):
 - Direct, ROI-focused. Assume ESTJ/C-type: data-driven, brief.
 - Start with permission: "Got 30 seconds?" 
-- Reference something SPECIFIC about {contact.get('company')} or their role
+- Reference something SPECIFIC about the contact's company or their role
 - State a LENDING PROBLEM they face (strategy, credit, timing, risk, structure, compliance, rates)
 - Acknowledge impact/cost
 - Brief social proof (similar banks solved this)
@@ -79,6 +97,63 @@ GUARDRAILS:
 - NOT fintech, software, platforms, apps, AI, automation, dashboards, CRM, tools
 - Solutions must be lending-related ONLY
 
+OUTPUT (JSON ONLY, no prose):
+{
+  "variant_1": {
+    "style": "Problem-Agitate-Solve",
+    "lines": ["<line 1>", "<line 2>", "<line 3>", "<line 4>"],
+    "cta": "<question>",
+    "objections": {"busy": "<reply>", "not_interested": "<reply>", "send_info": "<reply>"}
+  },
+  "variant_2": {...},
+  "variant_3": {...}
+}
+""".strip()
+
+
+_VARIANT_SCHEMA = {
+    "type": "object",
+    "properties": {
+        "style": {"type": "string", "enum": ["Problem-Agitate-Solve", "Social Proof", "Value-First Consultative"]},
+        "lines": {"type": "array", "items": {"type": "string"}, "minItems": 3, "maxItems": 6},
+        "cta": {"type": "string"},
+        "objections": {
+            "type": "object",
+            "properties": {
+                "busy": {"type": "string"},
+                "not_interested": {"type": "string"},
+                "send_info": {"type": "string"}
+            },
+            "required": ["busy", "not_interested", "send_info"],
+            "additionalProperties": False
+        }
+    },
+    "required": ["style", "lines", "cta", "objections"],
+    "additionalProperties": False
+}
+
+# Structured outputs: the API only returns JSON matching this schema
+RESPONSE_FORMAT = {
+    "type": "json_schema",
+    "json_schema": {
+        "name": "call_variants",
+        "strict": True,
+        "schema": {
+            "type": "object",
+            "properties": {key: _VARIANT_SCHEMA for key in ("variant_1", "variant_2", "variant_3")},
+            "required": ["variant_1", "variant_2", "variant_3"],
+            "additionalProperties": False
+        }
+    }
+}
+
+
+def _build_prompt(contact: Dict[str, Any], provider_name: Optional[str] = None) -> str:
+    """Builds the per-contact user message; instructions live in SYSTEM_PROMPT"""
+
+    provider = provider_name or "our team"
+
+    return f"""
 CONTACT:
 Name: {contact.get('name', 'Unknown')}
 Company: {contact.get('company', 'Unknown')}
@@ -87,18 +162,6 @@ MBTI: {contact.get('mbti', 'Unknown')}
 DISC: {contact.get('disc', 'Unknown')}
 News: {contact.get('news', 'Unknown')}
 Needs: {contact.get('value_props', 'Unknown')}
-
-OUTPUT (JSON ONLY, no prose):
-{{
-  "variant_1": {{
-    "style": "Problem-Agitate-Solve",
-    "lines": ["<line 1>", "<line 2>", "<line 3>", "<line 4>"],
-    "cta": "<question>",
-    "objections": {{"busy": "<reply>", "not_interested": "<reply>", "send_info": "<reply>"}}
-  }},
-  "variant_2": {{...}},
-  "variant_3": {{...}}
-}}
 """.strip()
 
 
@@ -106,27 +169,93 @@ OUTPUT (JSON ONLY, no prose):
 # API CALLS
 # ============================================================================
 
-def _call_model(prompt: str) -> str:
+def _response_text(resp) -> Optional[str]:
+    """Message text, or None when the model refused (strict schemas leave content empty)"""
+    message = resp.choices[0].message
+    if getattr(message, "refusal", None) or message.content is None:
+        return None
+    return message.content.strip()
+
+
+def _call_model(prompt: str) -> Optional[str]:
     """Call OpenAI API"""
     resp = client.chat.completions.create(
         model=MODEL,
-        messages=[{"role": "user", "content": prompt}],
+        messages=[
+            {"role": "system", "content": SYSTEM_PROMPT},
+            {"role": "user", "content": prompt}
+        ],
         temperature=0.6,
-        max_tokens=2000
+        max_tokens=2000,
+        response_format=RESPONSE_FORMAT
     )
-    return resp.choices[0].message.content.strip()
+    return _response_text(resp)
+
+
+async def _call_model_async(prompt: str) -> Optional[str]:
+    """Call OpenAI API without blocking the event loop"""
+    resp = await async_client.chat.completions.create(
+        model=MODEL,
+        messages=[
+            {"role": "system", "content": SYSTEM_PROMPT},
+            {"role": "user", "content": prompt}
+        ],
+        temperature=0.6,
+        max_tokens=2000,
+        response_format=RESPONSE_FORMAT
+    )
+    return _response_text(resp)
 
 
 def _contains_banned(text: str) -> bool:
     """Check for banned terms"""
-    lower = text.lower()
-    return any(term.lower() in lower for term in BANNED_TERMS)
+    return _BANNED_RE.search(text) is not None
 
 
 # ============================================================================
 # GENERATION LOGIC
 # ============================================================================
 
+def _check_response(raw: Optional[str]) -> Tuple[Optional[Dict[str, Any]], Optional[str], Optional[str]]:
+    """
+    Validate one model response.
+    Returns (data, None, None) when usable, else (None, problem, regenerate instruction).
+    """
+
+    # Refusal: no content to check; retry the same prompt
+    if raw is None:
+        return None, "⚠️  Model refused", ""
+
+    # Check for banned terms
+    if _contains_banned(raw):
+        return None, "⚠️  Banned terms detected", "\n\nREGENERATE: Remove fintech/software/platform/app/AI/automation. Lending only."
+
+    # Try JSON parse
+    try:
+        data = _json_loads(raw)
+
+        # raw already passed the banned-term scan, and re-serializing the
+        # parsed JSON cannot add terms, so it isn't scanned again
+
+        # Verify all variants
+        for key in ["variant_1", "variant_2", "variant_3"]:
+            if key not in data:
+                raise ValueError(f"Missing {key}")
+
+        return data, None, None
+
+    except Exception as e:
+        return None, "❌ Parse error", "\n\nREGENERATE: Return VALID JSON only. No prose."
+
+
+def _failure(raw: Optional[str]) -> Dict[str, Any]:
+    """Fallback result once every attempt is used up"""
+    return {
+        "error": f"Failed after {MAX_REGENERATIONS + 1} attempts",
+        "raw": raw[:300] if raw else None
+    }
+
+
 def generate_call_variants_api(
     contact_data: Dict[str, Any],
     provider_name: Optional[str] = None,
@@ -145,47 +274,43 @@ def generate_call_variants_api(
             print(f"  [Attempt {attempt + 1}/{MAX_REGENERATIONS + 1}]", end=" ")
 
         raw = _call_model(prompt)
+        data, problem, regenerate = _check_response(raw)
 
-        # Check for banned terms
-        if _contains_banned(raw):
+        if data is None:
             if verbose:
-                print("⚠️  Banned terms detected")
-            prompt += "\n\nREGENERATE: Remove fintech/software/platform/app/AI/automation. Lending only."
+                print(problem)
+            prompt += regenerate
             continue
 
-        # Try JSON parse
-        try:
-            data = json.loads(raw)
+        if verbose:
+            print("✅ Valid")
 
-            # Double-check parsed JSON
-            joined = json.dumps(data)
-            if _contains_banned(joined):
-                if verbose:
-                    print("⚠️  Banned terms in JSON")
-                prompt += "\n\nREGENERATE: Remove disallowed terms from JSON."
-                continue
+        return data
 
-            # Verify all variants
-            for key in ["variant_1", "variant_2", "variant_3"]:
-                if key not in data:
-                    raise ValueError(f"Missing {key}")
+    # Fallback
+    return _failure(raw)
 
-            if verbose:
-                print("✅ Valid")
 
-            return data
+async def generate_call_variants_api_async(
+    contact_data: Dict[str, Any],
+    provider_name: Optional[str] = None
+) -> Dict[str, Any]:
+    """Async generate_call_variants_api, for running many contacts concurrently"""
 
-        except Exception as e:
-            if verbose:
-                print(f"❌ Parse error")
-            prompt += "\n\nREGENERATE: Return VALID JSON only. No prose."
+    prompt = _build_prompt(contact_data, provider_name)
+    raw = None
+
+    for _ in range(MAX_REGENERATIONS + 1):
+        raw = await _call_model_async(prompt)
+        data, problem, regenerate = _check_response(raw)
+
+        if data is None:
+            prompt += regenerate
             continue
 
-    # Fallback
-    return {
-        "error": f"Failed after {MAX_REGENERATIONS + 1} attempts",
-        "raw": raw[:300] if raw else None
-    }
+        return data
+
+    return _failure(raw)
 
 
 # ============================================================================
@@ -196,28 +321,90 @@ def process_csv_to_jsonl(
     input_csv: str,
     output_jsonl: str,
     provider_name: Optional[str] = None,
-    verbose: bool = False
+    verbose: bool = False,
+    resume: bool = False
 ) -> None:
-    """Process CSV with enriched contacts, generate calls, output JSONL"""
+    """
+    Process CSV with enriched contacts, generate calls, output JSONL.
+    With resume=True, rows already in output_jsonl are skipped and new ones appended.
+    """
 
     if not os.path.exists(input_csv):
         print(f"❌ CSV not found: {input_csv}")
         return
 
+    df = pd.read_csv(input_csv, dtype=str, keep_default_na=False)
+
+    missing = REQUIRED_COLUMNS - set(df.columns)
+    if missing:
+        print(f"❌ CSV missing columns: {', '.join(sorted(missing))}")
+        return
+
+    done_rows = _written_rows(output_jsonl) if resume else set()
+    rows = [(i, row) for i, row in enumerate(df.to_dict(orient="records")) if i not in done_rows]
+    if done_rows and verbose:
+        print(f"⏭️  Skipping {len(done_rows)} rows already in {output_jsonl}")
+
+    total = asyncio.run(_process_rows(rows, output_jsonl, provider_name, verbose, append=bool(done_rows)))
+
+    print(f"✅ Processed {total} contacts. Output: {output_jsonl}")
+
+
+def _written_rows(output_jsonl: str) -> set:
+    """
+    CSV row indexes already recorded in an earlier run's output.
+    A partial last line left by an interrupted run is cut off so that row is redone.
+    """
+    if not os.path.exists(output_jsonl):
+        return set()
+
+    rows = set()
+    with open(output_jsonl, "r+b") as f:
+        complete = 0
+        for line in f:
+            if not line.endswith(b"\n"):
+                break
+            row = _json_loads(line).get("row")
+            if row is None:
+                raise ValueError(
+                    f"{output_jsonl} has records without a 'row' index; it was not written "
+                    "in the resumable format, so rerun with resume=False or a new output file"
+                )
+            rows.add(row)
+            complete += len(line)
+        f.truncate(complete)
+    return rows
+
+
+async def _process_rows(
+    rows: list,
+    output_jsonl: str,
+    provider_name: Optional[str],
+    verbose: bool,
+    append: bool = False
+) -> int:
+    """Generate up to BATCH_CONCURRENCY contacts at once, writing each as it finishes"""
+
+    sem = asyncio.Semaphore(BATCH_CONCURRENCY)
+
+    async def generate(index: int, row: Dict[str, Any]) -> Tuple[int, Dict[str, Any], Dict[str, Any]]:
+        async with sem:
+            return index, row, await generate_call_variants_api_async(row, provider_name=provider_name)
+
     total = 0
-    f_in = open(input_csv, newline='', encoding='utf-8')
-    f_out = open(output_jsonl, "w", encoding="utf-8")
+    f_out = open(output_jsonl, "ab" if append else "wb")
 
     try:
-        reader = csv.DictReader(f_in)
+        for done in asyncio.as_completed([generate(index, row) for index, row in rows]):
+            index, row, result = await done
+            total += 1
 
-        for i, row in enumerate(reader, 1):
             if verbose:
-                print(f"[{i}] {row.get('name')} @ {row.get('company')}")
-
-            result = generate_call_variants_api(row, provider_name=provider_name, verbose=verbose)
+                status = "❌" if "error" in result else "✅"
+                print(f"[{total}/{len(rows)}] {status} {row.get('name')} @ {row.get('company')}")
 
             record = {
+                "row": index,
                 "contact": {
                     "name": row.get("name"),
                     "company": row.get("company"),
@@ -226,14 +413,14 @@ def process_csv_to_jsonl(
                 "variants": result
             }
 
-            f_out.write(json.dumps(record, ensure_ascii=False) + "\n")
-            total += 1
+            f_out.write(_jsonl_line(record))
+            # Flush per record so every finished contact is on disk if the batch dies midway
+            f_out.flush()
 
     finally:
-        f_in.close()
         f_out.close()
 
-    print(f"✅ Processed {total} contacts. Output: {output_jsonl}")
+    return total
 
 
 # ============================================================================
@@ -41,21 +41,47 @@ class ActivityTracker:
 			
 		def log(self, contact_id: int, activity_type: str, 
 						variant: Optional[int] = None, channel: str = 'email',
-						status: str = 'completed', message: str = '', metadata: str = ''):
-				"""Log a sales activity"""
+						status: str = 'completed', message: str = '', metadata: str = '', conn=None):
+				"""Log a sales activity
+				Pass conn to write inside the caller's transaction (caller commits)"""
 			
-				conn = sqlite3.connect(self.db_path)
+				own_conn = conn is None
+				if own_conn:
+						conn = sqlite3.connect(self.db_path)
 				conn.execute("""
 						INSERT INTO activities 
 						(contact_id, activity_type, variant_used, channel, status, message, metadata, created_at)
 						VALUES (?, ?, ?, ?, ?, ?, ?, ?)
 				""", (contact_id, activity_type, variant, channel, status, message, metadata,
 							datetime.now(timezone.utc).isoformat()))
-				conn.commit()
-				conn.close()
+				if own_conn:
+						conn.commit()
+						conn.close()
 			
 				print(f"✅ Logged {activity_type} for contact {contact_id}")
 			
+		def log_many(self, rows, conn=None):
+				"""Log several activities with one batched INSERT
+				rows: (contact_id, activity_type, variant, channel, status, message, metadata)
+				Pass conn to write inside the caller's transaction (caller commits)"""
+				if not rows:
+						return
+			
+				created_at = datetime.now(timezone.utc).isoformat()
+				own_conn = conn is None
+				if own_conn:
+						conn = sqlite3.connect(self.db_path)
+				conn.executemany("""
+						INSERT INTO activities 
+						(contact_id, activity_type, variant_used, channel, status, message, metadata, created_at)
+						VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+				""", [tuple(row) + (created_at,) for row in rows])
+				if own_conn:
+						conn.commit()
+						conn.close()
+			
+				print(f"✅ Logged {len(rows)} activities")
+			
 		def get_activities(self, contact_id: int, limit: int = 50):
 				"""Get recent activities for a contact"""
 				conn = sqlite3.connect(self.db_path)
@@ -4,11 +4,8 @@
 
 import os
 import base64
+import functools
 from email.mime.text import MIMEText
-from google.auth.transport.requests import Request
-from google.oauth2.credentials import Credentials
-from google_auth_oauthlib.flow import InstalledAppFlow
-from googleapiclient.discovery import build
 
 SCOPES = ['https://www.googleapis.com/auth/gmail.send']
 
@@ -18,8 +15,16 @@ class GmailConnector:
 	def __init__(self):
 		self.service = self._get_service()
 		
-	def _get_service(self):
-		"""Authenticate and get Gmail service"""
+	@staticmethod
+	@functools.lru_cache(maxsize=1)
+	def _get_service():
+		"""Authenticate and get Gmail service (built once per process)"""
+		# Google client libraries are heavy; only import them when Gmail is used
+		from google.auth.transport.requests import Request
+		from google.oauth2.credentials import Credentials
+		from google_auth_oauthlib.flow import InstalledAppFlow
+		from googleapiclient.discovery import build
+	
 		creds = None
 		
 		if os.path.exists('token.json'):
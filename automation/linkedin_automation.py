@@ -4,9 +4,7 @@
 
 import sqlite3
 from datetime import datetime, timezone, timedelta
-import time
 import os
-import requests
 
 class LinkedInAutomation:
 		"""Automated LinkedIn outreach - SAFE & COMPLIANT"""
@@ -312,7 +310,8 @@ class LinkedInAutomation:
 								LIMIT ?
 						""", (quota['connection_requests']['remaining'],)).fetchall()
 					
-						pending['connection_requests'] = [dict(p) for p in prospects]
+						# sqlite3.Row already supports len() and key access
+						pending['connection_requests'] = prospects
 					
 				conn.close()
 				return pending
@@ -7,6 +7,26 @@ from datetime import datetime, timezone
 import json
 import os
 
+try:
+		import msgspec
+except ImportError:
+		msgspec = None
+
+
+def _pack(data):
+		"""Encode lead/insight payloads as compact MessagePack (JSON fallback)"""
+		if msgspec is not None:
+				return msgspec.msgpack.encode(data)
+		return json.dumps(data)
+
+
+def _unpack(raw):
+		"""Decode a payload written by _pack (rows stored as JSON text still load)"""
+		if isinstance(raw, bytes) and msgspec is not None:
+				return msgspec.msgpack.decode(raw)
+		return json.loads(raw)
+
+
 class SalesNavigatorIntegration:
 		"""LinkedIn Sales Navigator premium features"""
 	
@@ -23,7 +43,7 @@ class SalesNavigatorIntegration:
 								contact_id INTEGER,
 								linkedin_prospect_id INTEGER,
 								sales_nav_lead_id TEXT UNIQUE,
-								lead_data JSON,
+								lead_data BLOB,
 								last_synced TEXT,
 								notes TEXT,
 								saved_to_list TEXT,
@@ -37,7 +57,7 @@ class SalesNavigatorIntegration:
 								id INTEGER PRIMARY KEY AUTOINCREMENT,
 								lead_id INTEGER NOT NULL,
 								insight_type TEXT NOT NULL,
-								insight_data JSON NOT NULL,
+								insight_data BLOB NOT NULL,
 								discovered_at TEXT NOT NULL,
 								relevance_score REAL,
 								FOREIGN KEY (lead_id) REFERENCES sales_nav_leads(id)
@@ -69,7 +89,7 @@ class SalesNavigatorIntegration:
 								(contact_id, sales_nav_lead_id, lead_data, last_synced)
 								VALUES (?, ?, ?, ?)
 						""", (contact_id, lead_data.get('id'), 
-									json.dumps(lead_data), 
+									_pack(lead_data), 
 									datetime.now(timezone.utc).isoformat()))
 					
 						lead_id = conn.execute("SELECT last_insert_rowid()").fetchone()[0]
@@ -85,7 +105,50 @@ class SalesNavigatorIntegration:
 				finally:
 						conn.close()
 					
-		def _extract_insights(self, lead_id, lead_data):
+		def import_sales_nav_leads(self, leads, contact_id=None):
+				"""Import a batch of Sales Navigator leads in a single transaction"""
+			
+				conn = sqlite3.connect(self.db_path)
+				synced_at = datetime.now(timezone.utc).isoformat()
+			
+				try:
+						with conn:
+								# Take the write lock before reading MAX(id) so no other
+								# writer can insert between it and our rows
+								conn.execute("BEGIN IMMEDIATE")
+								last_id = conn.execute("SELECT COALESCE(MAX(id), 0) FROM sales_nav_leads").fetchone()[0]
+							
+								conn.executemany("""
+										INSERT OR IGNORE INTO sales_nav_leads 
+										(contact_id, sales_nav_lead_id, lead_data, last_synced)
+										VALUES (?, ?, ?, ?)
+								""", [(contact_id, lead.get('id'), _pack(lead), synced_at) for lead in leads])
+							
+								# AUTOINCREMENT ids only grow, so the new rows are exactly
+								# those above last_id, in insert order
+								inserted = conn.execute("""
+										SELECT id, sales_nav_lead_id FROM sales_nav_leads
+										WHERE id > ? ORDER BY id
+								""", (last_id,)).fetchall()
+							
+								imported = []
+								skipped = 0
+								pos = 0
+								for lead in leads:
+										if pos < len(inserted) and inserted[pos][1] == lead.get('id'):
+												lead_id = inserted[pos][0]
+												pos += 1
+												self._extract_insights(lead_id, lead, conn=conn)
+												imported.append(lead_id)
+										else:
+												skipped += 1
+					
+						return {'success': True, 'lead_ids': imported, 'skipped': skipped}
+			
+				finally:
+						conn.close()
+	
+		def _extract_insights(self, lead_id, lead_data, conn=None):
 				"""Extract actionable insights from Sales Nav data"""
 			
 				insights = []
@@ -142,18 +205,26 @@ class SalesNavigatorIntegration:
 								'score': 0.75
 						})
 					
-				# Save insights
-				conn = sqlite3.connect(self.db_path)
-				for insight in insights:
-						conn.execute("""
-								INSERT INTO sales_nav_insights 
-								(lead_id, insight_type, insight_data, discovered_at, relevance_score)
-								VALUES (?, ?, ?, ?, ?)
-						""", (lead_id, insight['type'], json.dumps(insight['data']),
-									datetime.now(timezone.utc).isoformat(), insight['score']))
-					
-				conn.commit()
-				conn.close()
+				# Save insights (inside the caller's transaction when a conn is passed)
+				discovered_at = datetime.now(timezone.utc).isoformat()
+				rows = [
+						(lead_id, insight['type'], _pack(insight['data']), discovered_at, insight['score'])
+						for insight in insights
+				]
+			
+				own_conn = conn is None
+				if own_conn:
+						conn = sqlite3.connect(self.db_path)
+			
+				conn.executemany("""
+						INSERT INTO sales_nav_insights 
+						(lead_id, insight_type, insight_data, discovered_at, relevance_score)
+						VALUES (?, ?, ?, ?, ?)
+				""", rows)
+			
+				if own_conn:
+						conn.commit()
+						conn.close()
 			
 		def create_saved_search(self, search_name, criteria, auto_import=False):
 				"""Save a Sales Navigator search for recurring use"""
@@ -192,7 +263,7 @@ class SalesNavigatorIntegration:
 				return [
 						{
 								'type': i['insight_type'],
-								'data': json.loads(i['insight_data']),
+								'data': _unpack(i['insight_data']),
 								'score': i['relevance_score']
 						}
 						for i in insights
@@ -212,7 +283,7 @@ class SalesNavigatorIntegration:
 						conn.close()
 						return None
 			
-				lead_data = json.loads(lead['lead_data'])
+				lead_data = _unpack(lead['lead_data'])
 				insights = self.get_lead_insights(lead_id)
 				conn.close()
 			
@@ -363,7 +434,17 @@ LinkMatch Pro:
 			
 		command = sys.argv[1]
 	
-		if command == 'analytics':
+		if command == 'import':
+				with open(sys.argv[2]) as f:
+						leads = json.load(f)
+			
+				if isinstance(leads, dict):
+						leads = [leads]
+			
+				result = sales_nav.import_sales_nav_leads(leads)
+				print(f"✅ Imported {len(result['lead_ids'])} leads ({result['skipped']} already imported)")
+	
+		elif command == 'analytics':
 				stats = sales_nav.get_premium_analytics()
 			
 				print("\n📊 Sales Navigator Analytics:\n")
@@ -3,18 +3,47 @@
 # meeting_scheduler.py - Calendar integration
 
 from datetime import datetime, timedelta
+import asyncio
+import os
 import sqlite3
+import threading
+
+# Proposed slots per tier: ((days out...), (hour of day...)) for each option
+_TIER_SLOTS = {
+	'HOT': ((1, 2, 2), (10, 14, 16)),  # 10am, 2pm, 4pm
+	'WARM': ((2, 3, 4), (10, 14, 15)),
+}
+_DEFAULT_SLOTS = ((5, 7, 7), (11, 14, 15))
+
+# Days to add to land on Monday, indexed by weekday() (Sat -> 2, Sun -> 1)
+_WEEKEND_SKIP = (0, 0, 0, 0, 0, 2, 1)
 
 class MeetingScheduler:
 	"""Smart meeting scheduling"""
 	
 	def __init__(self, db_path='sales_angel.db'):
 		self.db_path = db_path
-		self._init_tables()
 		
+		# One long-lived connection (autocommit) shared by all calls
+		self.conn = sqlite3.connect(db_path, check_same_thread=False, isolation_level=None)
+		self.conn.row_factory = sqlite3.Row
+		self.conn.execute("PRAGMA journal_mode=WAL")
+		self.conn.execute("PRAGMA synchronous=NORMAL")
+		self._lock = threading.Lock()
+		
+		self._init_tables()
+	
+	def close(self):
+		self.conn.close()
+	
+	def __enter__(self):
+		return self
+	
+	def __exit__(self, exc_type, exc, tb):
+		self.close()
+	
 	def _init_tables(self):
-		conn = sqlite3.connect(self.db_path)
-		conn.execute("""
+		self.conn.execute("""
 			CREATE TABLE IF NOT EXISTS meetings (
 				id INTEGER PRIMARY KEY AUTOINCREMENT,
 				contact_id INTEGER NOT NULL,
@@ -29,17 +58,18 @@ class MeetingScheduler:
 				FOREIGN KEY (contact_id) REFERENCES contacts(id)
 			)
 		""")
-		conn.commit()
-		conn.close()
 		
+		# Pre-rendered .ics file written at booking time
+		try:
+			self.conn.execute("ALTER TABLE meetings ADD COLUMN ics_path TEXT")
+		except sqlite3.OperationalError:
+			pass
+			
 	def propose_times(self, contact_id, num_options=3):
 		"""Propose meeting times based on best practices"""
 		
-		conn = sqlite3.connect(self.db_path)
-		conn.row_factory = sqlite3.Row
-		
-		contact = conn.execute("SELECT * FROM contacts WHERE id = ?", (contact_id,)).fetchone()
-		conn.close()
+		with self._lock:
+			contact = self.conn.execute("SELECT * FROM contacts WHERE id = ?", (contact_id,)).fetchone()
 		
 		if not contact:
 			return []
@@ -51,15 +81,7 @@ class MeetingScheduler:
 		# WARM: 2-3 days out
 		# Others: Next week
 		
-		if contact['tier'] == 'HOT':
-			days_out = [1, 2, 2]
-			hours = [10, 14, 16]  # 10am, 2pm, 4pm
-		elif contact['tier'] == 'WARM':
-			days_out = [2, 3, 4]
-			hours = [10, 14, 15]
-		else:
-			days_out = [5, 7, 7]
-			hours = [11, 14, 15]
+		days_out, hours = _TIER_SLOTS.get(contact['tier'], _DEFAULT_SLOTS)
 			
 		options = []
 		for i in range(num_options):
@@ -67,9 +89,8 @@ class MeetingScheduler:
 			time = time.replace(hour=hours[i], minute=0, second=0, microsecond=0)
 			
 			# Skip weekends
-			while time.weekday() >= 5:
-				time += timedelta(days=1)
-				
+			time += timedelta(days=_WEEKEND_SKIP[time.weekday()])
+			
 			options.append({
 				'datetime': time,
 				'formatted': time.strftime('%A, %B %d at %I:%M %p'),
@@ -81,31 +102,52 @@ class MeetingScheduler:
 	def book_meeting(self, contact_id, scheduled_at, title=None, duration=30, location='Video Call'):
 		"""Book a meeting"""
 		
-		conn = sqlite3.connect(self.db_path)
-		conn.row_factory = sqlite3.Row
-		
-		contact = conn.execute("SELECT * FROM contacts WHERE id = ?", (contact_id,)).fetchone()
+		# propose_times() hands back datetimes; store and render the same string
+		when = scheduled_at.isoformat() if isinstance(scheduled_at, datetime) else scheduled_at
 		
-		if not contact:
-			conn.close()
-			return None
-		
-		if not title:
-			title = f"Sales Meeting - {contact['firstname']} {contact['lastname']}"
+		with self._lock:
+			contact = self.conn.execute("SELECT * FROM contacts WHERE id = ?", (contact_id,)).fetchone()
 			
-		# Generate Zoom/Gmeet link (placeholder)
-		meeting_link = f"https://zoom.us/j/{contact_id}{int(datetime.now().timestamp())}"
-		
-		conn.execute("""
-			INSERT INTO meetings 
-			(contact_id, title, scheduled_at, duration_minutes, location, meeting_link, created_at)
-			VALUES (?, ?, ?, ?, ?, ?, ?)
-		""", (contact_id, title, scheduled_at, duration, location, meeting_link, 
-				datetime.now().isoformat()))
-		
-		meeting_id = conn.execute("SELECT last_insert_rowid()").fetchone()[0]
-		conn.commit()
-		conn.close()
+			if not contact:
+				return None
+			
+			if not title:
+				title = f"Sales Meeting - {contact['firstname']} {contact['lastname']}"
+			
+			# Generate Zoom/Gmeet link (placeholder)
+			meeting_link = f"https://zoom.us/j/{contact_id}{int(datetime.now().timestamp())}"
+			
+			# Row, invite file and ics_path land together or not at all
+			self.conn.execute("BEGIN")
+			ics_path = None
+			try:
+				cur = self.conn.execute("""
+					INSERT INTO meetings 
+					(contact_id, title, scheduled_at, duration_minutes, location, meeting_link, created_at)
+					VALUES (?, ?, ?, ?, ?, ?, ?)
+				""", (contact_id, title, when, duration, location, meeting_link, 
+						datetime.now().isoformat()))
+				
+				meeting_id = cur.lastrowid
+				
+				# Everything the invite needs is already in hand; render it now
+				ics_path = self._write_ics(meeting_id, {
+					'scheduled_at': when,
+					'duration_minutes': duration,
+					'title': title,
+					'firstname': contact['firstname'],
+					'lastname': contact['lastname'],
+					'meeting_link': meeting_link,
+					'location': location,
+					'email': contact['email']
+				})
+				self.conn.execute("UPDATE meetings SET ics_path = ? WHERE id = ?", (ics_path, meeting_id))
+				self.conn.execute("COMMIT")
+			except BaseException:
+				self.conn.execute("ROLLBACK")
+				if ics_path and os.path.exists(ics_path):
+					os.remove(ics_path)
+				raise
 		
 		return {
 			'id': meeting_id,
@@ -117,39 +159,53 @@ class MeetingScheduler:
 	
 	def get_upcoming(self, days=7):
 		"""Get upcoming meetings"""
-		conn = sqlite3.connect(self.db_path)
-		conn.row_factory = sqlite3.Row
-		
 		cutoff = (datetime.now() + timedelta(days=days)).isoformat()
 		
-		meetings = conn.execute("""
-			SELECT m.*, c.firstname, c.lastname, c.company
-			FROM meetings m
-			JOIN contacts c ON m.contact_id = c.id
-			WHERE m.scheduled_at <= ? AND m.status = 'scheduled'
-			ORDER BY m.scheduled_at ASC
-		""", (cutoff,)).fetchall()
+		with self._lock:
+			meetings = self.conn.execute("""
+				SELECT m.*, c.firstname, c.lastname, c.company
+				FROM meetings m
+				JOIN contacts c ON m.contact_id = c.id
+				WHERE m.scheduled_at <= ? AND m.status = 'scheduled'
+				ORDER BY m.scheduled_at ASC
+			""", (cutoff,)).fetchall()
 		
-		conn.close()
 		return [dict(m) for m in meetings]
 	
 	def generate_calendar_invite(self, meeting_id):
 		"""Generate .ics calendar file"""
 		
-		conn = sqlite3.connect(self.db_path)
-		conn.row_factory = sqlite3.Row
-		
-		meeting = conn.execute("""
-			SELECT m.*, c.firstname, c.lastname, c.email
-			FROM meetings m
-			JOIN contacts c ON m.contact_id = c.id
-			WHERE m.id = ?
-		""", (meeting_id,)).fetchone()
-		
-		conn.close()
-		
-		if not meeting:
-			return None
+		with self._lock:
+			meeting = self.conn.execute("SELECT ics_path FROM meetings WHERE id = ?", (meeting_id,)).fetchone()
+			
+			if not meeting:
+				return None
+			
+			if meeting['ics_path'] and os.path.exists(meeting['ics_path']):
+				return meeting['ics_path']
+			
+			# Booked before invites were pre-rendered (or file removed)
+			meeting = self.conn.execute("""
+				SELECT m.*, c.firstname, c.lastname, c.email
+				FROM meetings m
+				JOIN contacts c ON m.contact_id = c.id
+				WHERE m.id = ?
+			""", (meeting_id,)).fetchone()
+			
+			if not meeting:
+				return None
+			
+			filename = self._write_ics(meeting_id, meeting)
+			self.conn.execute("UPDATE meetings SET ics_path = ? WHERE id = ?", (filename, meeting_id))
+			
+		return filename
+	
+	async def generate_calendar_invite_async(self, meeting_id):
+		"""Generate .ics calendar file without blocking the event loop on disk I/O"""
+		return await asyncio.to_thread(self.generate_calendar_invite, meeting_id)
+	
+	def _write_ics(self, meeting_id, meeting):
+		"""Render and write the .ics file for a meeting, returning its path"""
 		
 		# Simple ICS format
 		ics = f"""BEGIN:VCALENDAR
@@ -4,16 +4,117 @@ REFERRAL SOURCE MATCHING AI
 Matches lenders with their ideal referral partners from their contact database
 """
 
+import bisect
+import dbm
+import functools
+import hashlib
+import heapq
+import io
 import json
+import re
+import shelve
+import sys
 import requests
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
-from typing import List, Dict, Tuple
+from typing import List, Dict, Optional, Tuple
+
+# pyahocorasick matches every keyword in one pass over the string; fall back
+# to precompiled per-tag regexes when it is not installed
+try:
+    import ahocorasick
+except ImportError:
+    ahocorasick = None
+
+HUBSPOT_SEARCH_URL = "https://api.hubapi.com/crm/v3/objects/contacts/search"
+SEARCH_PAGE_SIZE = 100
+SEARCH_WORKERS = 4  # HubSpot allows a handful of search requests per second
+
+CONTACT_PROPERTIES = [
+    "firstname", "lastname", "company", "phone", "email", "jobtitle",
+    "hs_lead_status", "lifecyclestage", "hs_linkedin_url", "num_contacted_notes"
+]
+
+# Tag for reason-rule keywords in the keyword indexes
+REASON_TAG = "_reason"
+
+# Tier lookup: bisect the score into the thresholds, index the label
+_TIER_THRESHOLDS = (40, 60, 75, 90)
+_TIER_LABELS = (
+    "🔍 TIER 5 - Low Priority",
+    "📊 TIER 4 - Worth Exploring",
+    "✅ TIER 3 - Good Potential",
+    "⭐ TIER 2 - High Value",
+    "🔥 TIER 1 - Top Priority"
+)
+
+# Contacts with these lead statuses are filtered out server-side
+EXCLUDED_LEAD_STATUSES = ["unqualified", "disqualified", "do not contact"]
+
+# Scored contacts are memoized in memory and on disk across runs
+SCORE_CACHE_PATH = ".refmatch_cache"
+SCORE_CACHE_MAXSIZE = 50_000
+
+
+@functools.lru_cache(maxsize=4096)
+def _normalize(contact_id: str, title: Optional[str], company: Optional[str], linkedin: Optional[str], notes: Optional[str], status: Optional[str]) -> Tuple:
+    """Scoring inputs for one contact: (title, company, has_linkedin, has_notes, is_open)
+    Keyed on the HubSpot id plus raw values, so it survives lender switches"""
+    return (
+        (title or '').lower(),
+        (company or '').lower(),
+        bool(linkedin),
+        int(notes or 0) > 0,
+        status == 'open'
+    )
+
+
+class KeywordIndex:
+    """Finds which tags have at least one keyword occurring in a string"""
+    
+    def __init__(self, words: Dict[str, List[Tuple]]):
+        # keyword -> tags it counts towards: (lender, category) or (REASON_TAG, rule)
+        self.words = {keyword: tuple(tags) for keyword, tags in words.items()}
+        self._automaton = None
+        self._patterns = []
+        if ahocorasick is not None and self.words:
+            self._automaton = ahocorasick.Automaton()
+            for keyword, tags in self.words.items():
+                self._automaton.add_word(keyword, tags)
+            self._automaton.make_automaton()
+        else:
+            keywords_by_tag = {}
+            for keyword, tags in self.words.items():
+                for tag in tags:
+                    keywords_by_tag.setdefault(tag, []).append(keyword)
+            self._patterns = [
+                (tag, re.compile('|'.join(map(re.escape, keywords))))
+                for tag, keywords in keywords_by_tag.items()
+            ]
+    
+    def find(self, text: str) -> set:
+        """Tags with any keyword in text"""
+        if self._automaton is not None:
+            found = set()
+            for _, tags in self._automaton.iter(text):
+                found.update(tags)
+            return found
+        return {tag for tag, pattern in self._patterns if pattern.search(text)}
+
 
 class ReferralSourceMatcher:
     def __init__(self):
         with open('config.json') as f:
             self.config = json.load(f)
         
+        # One keep-alive session reuses the TLS connection across pages
+        self._session = requests.Session()
+        self._session.headers.update({
+            'Authorization': f'Bearer {self.config["HUBSPOT_API_KEY"]}',
+            'Accept-Encoding': 'gzip'
+        })
+        
         # Lender profiles with their ideal referral sources
         self.LENDER_PROFILES = {
             "nationwide_direct": {
@@ -80,209 +181,324 @@ class ReferralSourceMatcher:
                 }
             }
         }
+        
+        # Why-this-match reasons, first rule wins: (title keywords, company
+        # keywords, reason). A rule fires when any keyword of each non-empty
+        # group was found in the contact's title / company.
+        self._reason_rules = [
+            (frozenset({"commercial"}), frozenset({"bank"}), "Commercial banker at major bank - can refer declined deals"),
+            (frozenset({"sba"}), frozenset(), "SBA specialist - perfect for 504/7a referrals"),
+            (frozenset(), frozenset({"colliers", "cbre", "jll"}), "Major CRE broker - handles large transactions"),
+            (frozenset({"mortgage", "broker"}), frozenset(), "Mortgage broker - steady referral source"),
+            (frozenset({"owner", "president"}), frozenset(), "Business owner - potential direct borrower"),
+        ]
+        
+        # Opening lines per referral category; {name} is the contact's first name
+        self._approach_templates = {
+            'commercial_bankers': "Hi {name}, I specialize in CRE deals your bank declines. Let's set up a referral partnership - I pay 1% on closed deals.",
+            'sba_bankers': "Hi {name}, I handle SBA 504/7a loans nationwide. Happy to be your overflow partner when you're at capacity.",
+            'cre_brokers': "Hi {name}, I close CRE loans in 30 days with 90% LTV. Want to add me to your preferred lender list?",
+            'mortgage_brokers': "Hi {name}, I do CRE loans from $500K-$20M. Let's discuss how we can work together on deals."
+        }
+        self._default_approach = "Hi {name}, I provide {product} financing. Let's explore how we can refer business to each other."
+        
+        # Keyword indexes are built on first use per lender and kept for
+        # later runs against the same lender
+        self._automata = {}
+        self._lender_contexts = {}
+        
+        # Disk entries are salted with the profiles and rules so editing
+        # either invalidates old scores
+        rules = [(sorted(t), sorted(c), reason) for t, c, reason in self._reason_rules]
+        self._cache_salt = json.dumps([self.LENDER_PROFILES, rules], sort_keys=True)
+        self._disk_cache = None
+        self._score_contact = functools.lru_cache(maxsize=SCORE_CACHE_MAXSIZE)(self._score_contact_cached)
+    
+    def close(self):
+        """Flush the on-disk score cache and release HTTP connections"""
+        if self._disk_cache is not None:
+            self._disk_cache.close()
+            self._disk_cache = None
+        self._session.close()
+    
+    def _get_automata(self, lender_type: str) -> Tuple:
+        """Index one lender's title/company keywords for single-pass matching"""
+        if lender_type in self._automata:
+            return self._automata[lender_type]
+        
+        title_words = {}
+        company_words = {}
+        
+        for category, criteria in self.LENDER_PROFILES[lender_type]['ideal_referrals'].items():
+            for keyword in criteria['titles']:
+                title_words.setdefault(keyword, []).append((lender_type, category))
+            for keyword in criteria['companies']:
+                if keyword != "*":
+                    company_words.setdefault(keyword, []).append((lender_type, category))
+        
+        # Reason keywords ride along in the same pass, tagged with their rule
+        for rule, (title_needles, company_needles, _) in enumerate(self._reason_rules):
+            for keyword in title_needles:
+                title_words.setdefault(keyword, []).append((REASON_TAG, rule))
+            for keyword in company_needles:
+                company_words.setdefault(keyword, []).append((REASON_TAG, rule))
+        
+        automata = self._automata[lender_type] = (KeywordIndex(title_words), KeywordIndex(company_words))
+        return automata
+    
+    def _lender_context(self, lender_type: str) -> Tuple:
+        """Per-lender lookups shared by every contact analyzed for that lender"""
+        if lender_type not in self.LENDER_PROFILES:
+            lender_type = 'nationwide_direct'
+        context = self._lender_contexts.get(lender_type)
+        if context is None:
+            # (category, score, match reason, title reason, company reason)
+            categories = [
+                (
+                    category,
+                    criteria['score'],
+                    f"Matches {category.replace('_', ' ').title()} profile",
+                    f"Title matches {category.replace('_', ' ')}",
+                    f"Company type matches {category.replace('_', ' ')}"
+                )
+                for category, criteria in self.LENDER_PROFILES[lender_type]['ideal_referrals'].items()
+            ]
+            wildcard_categories = frozenset(
+                category
+                for category, criteria in self.LENDER_PROFILES[lender_type]['ideal_referrals'].items()
+                if "*" in criteria['companies']
+            )
+            context = self._lender_contexts[lender_type] = (
+                lender_type, categories, wildcard_categories, *self._get_automata(lender_type)
+            )
+        return context
     
     def analyze_contact_for_referral(self, contact: Dict, lender_type: str) -> Dict:
         """Analyze a single contact for referral potential"""
+        return self._analyze(contact, self._lender_context(lender_type))
+    
+    def analyze_contacts(self, contacts: List[Dict], lender_type: str) -> List[Dict]:
+        """Analyze a batch of contacts, keeping those with any referral potential"""
+        context = self._lender_context(lender_type)
+        analyzed = []
+        for contact in contacts:
+            analysis = self._analyze(contact, context)
+            if analysis['match_score'] > 0:
+                analyzed.append(analysis)
+        return analyzed
+    
+    def _analyze(self, contact: Dict, context: Tuple) -> Dict:
+        """Score one contact against a resolved lender context"""
+        lender_type = context[0]
         props = contact.get('properties', {})
         
         # Get contact details
         name = f"{props.get('firstname', '')} {props.get('lastname', '')}".strip()
-        company = (props.get('company', '') or '').lower()
-        title = (props.get('jobtitle', '') or '').lower()
         phone = props.get('phone', '')
         email = props.get('email', '')
         
-        # Get lender profile
-        profile = self.LENDER_PROFILES.get(lender_type, self.LENDER_PROFILES['nationwide_direct'])
+        normalized = _normalize(
+            contact.get('id'),
+            props.get('jobtitle'),
+            props.get('company'),
+            props.get('hs_linkedin_url'),
+            props.get('num_contacted_notes'),
+            props.get('hs_lead_status')
+        )
+        match_score, matched_category, match_reasons = self._score_contact(lender_type, *normalized)
+        
+        return {
+            'contact': contact,
+            'name': name or 'Unknown',
+            'title': props.get('jobtitle', 'Unknown'),
+            'company': props.get('company', 'Unknown'),
+            'phone': phone,
+            'email': email,
+            'match_score': min(match_score, 100),
+            'match_category': matched_category,
+            'match_reasons': list(match_reasons),
+            'referral_potential': self.calculate_referral_potential(match_score)
+        }
+    
+    def _score_contact_cached(self, lender_type: str, title: str, company: str, has_linkedin: bool, has_notes: bool, is_open: bool) -> Tuple:
+        """Disk-backed score lookup behind the in-memory LRU"""
+        if self._disk_cache is None:
+            try:
+                self._disk_cache = shelve.open(SCORE_CACHE_PATH)
+            except dbm.error + (OSError,):
+                self._disk_cache = {}
+        
+        args = (lender_type, title, company, has_linkedin, has_notes, is_open)
+        key = hashlib.blake2b(repr((self._cache_salt, args)).encode(), digest_size=16).hexdigest()
+        result = self._disk_cache.get(key)
+        if result is None:
+            result = self._score_core(*args)
+            self._disk_cache[key] = result
+        return result
+    
+    def _score_core(self, lender_type: str, title: str, company: str, has_linkedin: bool, has_notes: bool, is_open: bool) -> Tuple:
+        """Score normalized contact fields; returns (score, category, reasons)"""
+        _, categories, wildcard_categories, title_index, company_index = self._lender_context(lender_type)
+        
+        # One pass over each string finds the categories and reason rules it matches
+        title_tags = title_index.find(title)
+        company_tags = company_index.find(company)
+        title_categories = {category for tag, category in title_tags if tag != REASON_TAG}
+        company_categories = {category for tag, category in company_tags if tag != REASON_TAG}
+        company_categories.update(wildcard_categories)
         
         # Score the contact
         match_score = 0
         match_reasons = []
         matched_category = None
         
-        for category, criteria in profile['ideal_referrals'].items():
-            category_match = False
-            
-            # Check title match
-            title_match = any(keyword in title for keyword in criteria['titles'])
-            
-            # Check company match
-            company_match = False
-            if criteria['companies'] == ["*"]:
-                company_match = True
-            else:
-                company_match = any(keyword in company for keyword in criteria['companies'])
+        for category, score, match_reason, title_reason, company_reason in categories:
+            title_match = category in title_categories
+            company_match = category in company_categories
             
             # Calculate match
             if title_match and company_match:
-                match_score = criteria['score']
+                match_score = score
                 matched_category = category
-                category_match = True
                 
                 # Add specific reasons
-                if 'bank' in company and 'commercial' in title:
-                    match_reasons.append("Commercial banker at major bank - can refer declined deals")
-                elif 'sba' in title:
-                    match_reasons.append("SBA specialist - perfect for 504/7a referrals")
-                elif any(broker in company for broker in ['colliers', 'cbre', 'jll']):
-                    match_reasons.append("Major CRE broker - handles large transactions")
-                elif 'mortgage' in title or 'broker' in title:
-                    match_reasons.append("Mortgage broker - steady referral source")
-                elif 'owner' in title or 'president' in title:
-                    match_reasons.append("Business owner - potential direct borrower")
+                for rule, (title_needles, company_needles, reason) in enumerate(self._reason_rules):
+                    if ((not title_needles or (REASON_TAG, rule) in title_tags)
+                            and (not company_needles or (REASON_TAG, rule) in company_tags)):
+                        match_reasons.append(reason)
+                        break
                 else:
-                    match_reasons.append(f"Matches {category.replace('_', ' ').title()} profile")
+                    match_reasons.append(match_reason)
             
             elif title_match:
-                match_score = max(match_score, criteria['score'] * 0.6)
-                match_reasons.append(f"Title matches {category.replace('_', ' ')}")
+                match_score = max(match_score, score * 0.6)
+                match_reasons.append(title_reason)
             elif company_match:
-                match_score = max(match_score, criteria['score'] * 0.4)
-                match_reasons.append(f"Company type matches {category.replace('_', ' ')}")
+                match_score = max(match_score, score * 0.4)
+                match_reasons.append(company_reason)
         
         # Bonus scoring factors
-        if props.get('hs_linkedin_url'):
+        if has_linkedin:
             match_score += 5
             match_reasons.append("LinkedIn connected")
         
-        if int(props.get('num_contacted_notes', 0) or 0) > 0:
+        if has_notes:
             match_score += 10
             match_reasons.append("Previous interaction history")
         
-        if props.get('hs_lead_status') == 'open':
+        if is_open:
             match_score += 5
             match_reasons.append("Active lead status")
         
-        return {
-            'contact': contact,
-            'name': name or 'Unknown',
-            'title': props.get('jobtitle', 'Unknown'),
-            'company': props.get('company', 'Unknown'),
-            'phone': phone,
-            'email': email,
-            'match_score': min(match_score, 100),
-            'match_category': matched_category,
-            'match_reasons': match_reasons,
-            'referral_potential': self.calculate_referral_potential(match_score)
-        }
+        return match_score, matched_category, tuple(match_reasons)
     
     def calculate_referral_potential(self, score: int) -> str:
         """Calculate referral potential tier"""
-        if score >= 90:
-            return "🔥 TIER 1 - Top Priority"
-        elif score >= 75:
-            return "⭐ TIER 2 - High Value"
-        elif score >= 60:
-            return "✅ TIER 3 - Good Potential"
-        elif score >= 40:
-            return "📊 TIER 4 - Worth Exploring"
-        else:
-            return "🔍 TIER 5 - Low Priority"
+        return _TIER_LABELS[bisect.bisect_right(_TIER_THRESHOLDS, score)]
+    
+    def _search_contacts_page(self, after: Optional[str] = None) -> Dict:
+        """Fetch one page of qualified contacts from the HubSpot search API"""
+        payload = {
+            "filterGroups": [
+                {"filters": [{"propertyName": "hs_lead_status", "operator": "NOT_IN", "values": EXCLUDED_LEAD_STATUSES}]},
+                {"filters": [{"propertyName": "hs_lead_status", "operator": "NOT_HAS_PROPERTY"}]}
+            ],
+            "properties": CONTACT_PROPERTIES,
+            "limit": SEARCH_PAGE_SIZE
+        }
+        if after:
+            payload["after"] = after
+        
+        response = self._session.post(HUBSPOT_SEARCH_URL, json=payload, timeout=30)
+        
+        if response.status_code == 200:
+            return response.json()
+        return {}
     
     def get_contacts(self, limit: int = 200) -> List[Dict]:
         """Get contacts from HubSpot"""
-        url = "https://api.hubapi.com/crm/v3/objects/contacts"
-        headers = {'Authorization': f'Bearer {self.config["HUBSPOT_API_KEY"]}'}
+        first_page = self._search_contacts_page()
+        all_contacts = first_page.get('results', [])
         
-        all_contacts = []
-        after = None
+        # Search cursors are result offsets, so the remaining pages are known
+        # from the first page's total and can be fetched in parallel
+        total = min(first_page.get('total', 0), limit)
+        cursors = [str(offset) for offset in range(len(all_contacts), total, SEARCH_PAGE_SIZE)]
         
-        while len(all_contacts) < limit:
-            params = {
-                'limit': min(100, limit - len(all_contacts)),
-                'properties': 'firstname,lastname,company,phone,email,jobtitle,hs_lead_status,lifecyclestage,hs_linkedin_url,num_contacted_notes'
-            }
-            if after:
-                params['after'] = after
-                
-            response = requests.get(url, headers=headers, params=params)
-            
-            if response.status_code == 200:
-                data = response.json()
-                results = data.get('results', [])
-                
-                for contact in results:
-                    props = contact.get('properties', {})
-                    lead_status = (props.get('hs_lead_status') or '').lower()
-                    
-                    # Skip unqualified
-                    if lead_status not in ['unqualified', 'do not contact', 'disqualified']:
-                        all_contacts.append(contact)
-                        if len(all_contacts) >= limit:
-                            break
-                
-                if data.get('paging', {}).get('next'):
-                    after = data['paging']['next']['after']
-                else:
-                    break
-            else:
-                break
+        if cursors:
+            with ThreadPoolExecutor(max_workers=SEARCH_WORKERS) as executor:
+                for page in executor.map(self._search_contacts_page, cursors):
+                    all_contacts.extend(page.get('results', []))
         
-        return all_contacts
+        return all_contacts[:limit]
     
     def match_referral_sources(self, lender_type: str = "nationwide_direct", limit: int = 200):
         """Main matching function"""
-        print("\n" + "="*80)
-        print("🎯 REFERRAL SOURCE MATCHING AI")
-        print("="*80)
+        # Build the report in memory and write it in one go rather than
+        # paying for a locked stdout write per line
+        buf = io.StringIO()
+        out = functools.partial(print, file=buf)
+        
+        out("\n" + "="*80)
+        out("🎯 REFERRAL SOURCE MATCHING AI")
+        out("="*80)
         
         # Display lender profile
         profile = self.LENDER_PROFILES.get(lender_type, self.LENDER_PROFILES['nationwide_direct'])
-        print(f"\n📊 YOUR LENDER PROFILE:")
-        print(f"Type: {profile['name']}")
-        print(f"Products: {', '.join(profile['products'])}")
-        print(f"\n🎯 Your Ideal Referral Sources:")
+        out(f"\n📊 YOUR LENDER PROFILE:")
+        out(f"Type: {profile['name']}")
+        out(f"Products: {', '.join(profile['products'])}")
+        out(f"\n🎯 Your Ideal Referral Sources:")
         for category, criteria in profile['ideal_referrals'].items():
-            print(f"  • {category.replace('_', ' ').title()}")
+            out(f"  • {category.replace('_', ' ').title()}")
         
-        print(f"\n🔍 Analyzing your {limit} contacts...")
+        out(f"\n🔍 Analyzing your {limit} contacts...")
+        
+        # Show the header before the HubSpot fetch
+        sys.stdout.write(buf.getvalue())
+        sys.stdout.flush()
+        buf.seek(0)
+        buf.truncate()
         
         # Get and analyze contacts
         contacts = self.get_contacts(limit)
-        analyzed_contacts = []
-        
-        for contact in contacts:
-            analysis = self.analyze_contact_for_referral(contact, lender_type)
-            if analysis['match_score'] > 0:
-                analyzed_contacts.append(analysis)
+        analyzed_contacts = self.analyze_contacts(contacts, lender_type)
         
-        # Sort by match score
-        analyzed_contacts.sort(key=lambda x: x['match_score'], reverse=True)
+        # Only the top 15 are shown, so select them without sorting everything
+        top_matches = heapq.nlargest(15, analyzed_contacts, key=lambda x: x['match_score'])
         
         # Display results
-        print("\n" + "="*80)
-        print("🏆 TOP 15 REFERRAL SOURCE MATCHES:")
-        print("="*80 + "\n")
-        
-        for i, match in enumerate(analyzed_contacts[:15], 1):
-            print(f"{i}. {match['name']}")
-            print(f"   📍 {match['title']} at {match['company']}")
-            print(f"   📞 {match['phone'] or 'No phone'}")
-            print(f"   📊 Match Score: {match['match_score']}/100 - {match['referral_potential']}")
-            print(f"   🎯 Why: {match['match_reasons'][0] if match['match_reasons'] else 'Potential referral source'}")
+        out("\n" + "="*80)
+        out("🏆 TOP 15 REFERRAL SOURCE MATCHES:")
+        out("="*80 + "\n")
+        
+        for i, match in enumerate(top_matches, 1):
+            out(f"{i}. {match['name']}")
+            out(f"   📍 {match['title']} at {match['company']}")
+            out(f"   📞 {match['phone'] or 'No phone'}")
+            out(f"   📊 Match Score: {match['match_score']}/100 - {match['referral_potential']}")
+            out(f"   🎯 Why: {match['match_reasons'][0] if match['match_reasons'] else 'Potential referral source'}")
             
             # Generate personalized approach
             approach = self.generate_referral_approach(match, profile)
-            print(f"   💬 Approach: \"{approach}\"")
-            print()
+            out(f"   💬 Approach: \"{approach}\"")
+            out()
         
         # Show category breakdown
-        print("="*80)
-        print("📈 REFERRAL SOURCE BREAKDOWN:")
-        print("-"*40)
+        out("="*80)
+        out("📈 REFERRAL SOURCE BREAKDOWN:")
+        out("-"*40)
         
-        categories = {}
-        for match in analyzed_contacts:
-            cat = match['match_category'] or 'other'
-            if cat not in categories:
-                categories[cat] = 0
-            categories[cat] += 1
+        categories = Counter(match['match_category'] or 'other' for match in analyzed_contacts)
         
-        for cat, count in sorted(categories.items(), key=lambda x: x[1], reverse=True):
-            print(f"  • {cat.replace('_', ' ').title()}: {count} contacts")
+        for cat, count in categories.most_common():
+            out(f"  • {cat.replace('_', ' ').title()}: {count} contacts")
         
-        print(f"\nTotal qualified referral sources: {len(analyzed_contacts)}")
-        print("="*80)
+        out(f"\nTotal qualified referral sources: {len(analyzed_contacts)}")
+        out("="*80)
+        
+        sys.stdout.write(buf.getvalue())
+        sys.stdout.flush()
         
         return analyzed_contacts
     
@@ -290,16 +506,8 @@ class ReferralSourceMatcher:
         """Generate personalized approach for referral partner"""
         name = match['name'].split()[0] if match['name'] != 'Unknown' else 'there'
         
-        if match['match_category'] == 'commercial_bankers':
-            return f"Hi {name}, I specialize in CRE deals your bank declines. Let's set up a referral partnership - I pay 1% on closed deals."
-        elif match['match_category'] == 'sba_bankers':
-            return f"Hi {name}, I handle SBA 504/7a loans nationwide. Happy to be your overflow partner when you're at capacity."
-        elif match['match_category'] == 'cre_brokers':
-            return f"Hi {name}, I close CRE loans in 30 days with 90% LTV. Want to add me to your preferred lender list?"
-        elif match['match_category'] == 'mortgage_brokers':
-            return f"Hi {name}, I do CRE loans from $500K-$20M. Let's discuss how we can work together on deals."
-        else:
-            return f"Hi {name}, I provide {profile['products'][0]} financing. Let's explore how we can refer business to each other."
+        template = self._approach_templates.get(match['match_category'], self._default_approach)
+        return template.format(name=name, product=profile['products'][0])
 
 def main():
     """Interactive lender profile selection"""
@@ -321,7 +529,10 @@ def main():
     lender_type = lender_map.get(choice, "nationwide_direct")
     
     # Run the matching
-    matcher.match_referral_sources(lender_type)
+    try:
+        matcher.match_referral_sources(lender_type)
+    finally:
+        matcher.close()
 
 if __name__ == "__main__":
     main()
@@ -47,9 +47,17 @@ class SmartCadence:
 				self.tracker = ActivityTracker(db_path)
 				self._init_tables()
 			
+		def _connect(self):
+				"""Open a connection with Row access; WAL lets NORMAL sync stay safe"""
+				conn = sqlite3.connect(self.db_path)
+				conn.row_factory = sqlite3.Row
+				conn.execute("PRAGMA synchronous=NORMAL")
+				return conn
+			
 		def _init_tables(self):
 				"""Create cadence tracking table"""
 				conn = sqlite3.connect(self.db_path)
+				conn.execute("PRAGMA journal_mode=WAL")
 				conn.execute("""
 						CREATE TABLE IF NOT EXISTS cadences (
 								id INTEGER PRIMARY KEY AUTOINCREMENT,
@@ -63,6 +71,17 @@ class SmartCadence:
 								FOREIGN KEY (contact_id) REFERENCES contacts(id)
 						)
 				""")
+			
+				# Active-cadence lookups (start/execute/stop) and the due sweep
+				# filter on status; the partial index only holds active rows
+				conn.execute("""
+						CREATE INDEX IF NOT EXISTS idx_cadences_active_contact
+						ON cadences(contact_id) WHERE status = 'active'
+				""")
+				conn.execute("""
+						CREATE INDEX IF NOT EXISTS idx_cadences_status
+						ON cadences(status)
+				""")
 				conn.commit()
 				conn.close()
 			
@@ -73,39 +92,45 @@ class SmartCadence:
 						print(f"❌ Unknown cadence type: {cadence_type}")
 						return False
 			
-				conn = sqlite3.connect(self.db_path)
-			
-				# Check if already in a cadence
-				existing = conn.execute("""
-						SELECT id FROM cadences 
-						WHERE contact_id = ? AND status = 'active'
-				""", (contact_id,)).fetchone()
-			
-				if existing:
-						print(f"⚠️  Contact {contact_id} already in active cadence")
+				conn = self._connect()
+				try:
+						with conn:
+								# Check if already in a cadence
+								existing = conn.execute("""
+										SELECT id FROM cadences 
+										WHERE contact_id = ? AND status = 'active'
+								""", (contact_id,)).fetchone()
+			
+								if existing:
+										print(f"⚠️  Contact {contact_id} already in active cadence")
+										return False
+			
+								# Start new cadence
+								conn.execute("""
+										INSERT INTO cadences (contact_id, cadence_type, started_at)
+										VALUES (?, ?, ?)
+								""", (contact_id, cadence_type, datetime.now(timezone.utc).isoformat()))
+			
+								print(f"✅ Started {self.CADENCES[cadence_type]['name']} for contact {contact_id}")
+			
+								# Execute first step immediately, in the same transaction
+								self.execute_next_step(contact_id, conn=conn)
+				finally:
 						conn.close()
-						return False
-			
-				# Start new cadence
-				conn.execute("""
-						INSERT INTO cadences (contact_id, cadence_type, started_at)
-						VALUES (?, ?, ?)
-				""", (contact_id, cadence_type, datetime.now(timezone.utc).isoformat()))
-			
-				conn.commit()
-				conn.close()
-			
-				print(f"✅ Started {self.CADENCES[cadence_type]['name']} for contact {contact_id}")
-			
-				# Execute first step immediately
-				self.execute_next_step(contact_id)
 				return True
 	
-		def execute_next_step(self, contact_id: int):
-				"""Execute the next cadence step for a contact"""
-			
-				conn = sqlite3.connect(self.db_path)
-				conn.row_factory = sqlite3.Row
+		def execute_next_step(self, contact_id: int, conn=None):
+				"""Execute the next cadence step for a contact
+				Pass conn to run inside the caller's transaction (caller commits)"""
+			
+				if conn is None:
+						conn = self._connect()
+						try:
+								with conn:
+										self.execute_next_step(contact_id, conn=conn)
+						finally:
+								conn.close()
+						return
 			
 				cadence = conn.execute("""
 						SELECT * FROM cadences 
@@ -113,34 +138,33 @@ class SmartCadence:
 				""", (contact_id,)).fetchone()
 			
 				if not cadence:
-						conn.close()
 						return
 			
-				cadence_config = self.CADENCES[cadence['cadence_type']]
+				type_id = CADENCE_TYPE_IDS[cadence['cadence_type']]
 				current_step = cadence['current_step']
 			
-				if current_step >= len(cadence_config['steps']):
+				if current_step >= len(CADENCE_STEP_DAYS[type_id]):
 						# Cadence complete
 						conn.execute("""
 								UPDATE cadences 
 								SET status = 'completed', completed_at = ?
 								WHERE id = ?
 						""", (datetime.now(timezone.utc).isoformat(), cadence['id']))
-						conn.commit()
-						conn.close()
 						print(f"✅ Cadence completed for contact {contact_id}")
 						return
 			
-				step = cadence_config['steps'][current_step]
+				action = CADENCE_STEP_ACTIONS[type_id][current_step]
+				variant = CADENCE_STEP_VARIANTS[type_id][current_step]
 			
 				# Log the action
-				action_type = f"{step['action']}_{'sent' if step['action'] == 'email' else 'attempted'}"
+				action_type = f"{action}_{'sent' if action == 'email' else 'attempted'}"
 				self.tracker.log(
 						contact_id, 
 						action_type,
-						variant=step['variant'],
-						channel=step['action'],
-						message=f"Cadence step {current_step + 1}"
+						variant=variant,
+						channel=action,
+						message=f"Cadence step {current_step + 1}",
+						conn=conn
 				)
 			
 				# Update cadence
@@ -150,42 +174,66 @@ class SmartCadence:
 						WHERE id = ?
 				""", (current_step + 1, datetime.now(timezone.utc).isoformat(), cadence['id']))
 			
-				conn.commit()
-				conn.close()
-			
-				print(f"✅ Executed step {current_step + 1}: {step['action']} (variant {step['variant']})")
+				print(f"✅ Executed step {current_step + 1}: {action} (variant {variant})")
 			
 		def check_due_actions(self):
 				"""Check for and execute any due cadence actions"""
 			
-				conn = sqlite3.connect(self.db_path)
-				conn.row_factory = sqlite3.Row
-			
-				active_cadences = conn.execute("""
-						SELECT * FROM cadences WHERE status = 'active'
-				""").fetchall()
+				now = datetime.now(timezone.utc).isoformat()
+				log_rows = []
+				to_update = []
+				to_complete = []
+			
+				conn = self._connect()
+				try:
+						# One connection and one commit for the whole sweep
+						with conn:
+								# Age in days since the last touch is computed by SQLite, so
+								# no per-row timestamp parsing happens in Python
+								active_cadences = conn.execute("""
+										SELECT id, contact_id, cadence_type, current_step,
+												julianday('now') - julianday(COALESCE(last_action_at, started_at)) AS age_days
+										FROM cadences WHERE status = 'active'
+								""").fetchall()
+			
+								for cadence in active_cadences:
+										type_id = CADENCE_TYPE_IDS[cadence['cadence_type']]
+										current_step = cadence['current_step']
+			
+										if current_step >= len(CADENCE_STEP_DAYS[type_id]):
+												to_complete.append((now, cadence['id']))
+												continue
+			
+										if cadence['age_days'] < CADENCE_STEP_DAYS[type_id][current_step]:
+												continue
+			
+										action = CADENCE_STEP_ACTIONS[type_id][current_step]
+										variant = CADENCE_STEP_VARIANTS[type_id][current_step]
+										action_type = f"{action}_{'sent' if action == 'email' else 'attempted'}"
+										log_rows.append((cadence['contact_id'], action_type, variant, action,
+														'completed', f"Cadence step {current_step + 1}", ''))
+										to_update.append((current_step + 1, now, cadence['id']))
+										print(f"✅ Executed step {current_step + 1}: {action} (variant {variant}) for contact {cadence['contact_id']}")
+			
+								# Apply every due step with one batched insert and update
+								self.tracker.log_many(log_rows, conn=conn)
+								conn.executemany("""
+										UPDATE cadences 
+										SET current_step = ?, last_action_at = ?
+										WHERE id = ?
+								""", to_update)
+								conn.executemany("""
+										UPDATE cadences 
+										SET status = 'completed', completed_at = ?
+										WHERE id = ?
+								""", to_complete)
+				finally:
+						conn.close()
 			
-				conn.close()
+				if to_complete:
+						print(f"✅ Completed {len(to_complete)} finished cadences")
 			
-				executed = 0
-				for cadence in active_cadences:
-						cadence_config = self.CADENCES[cadence['cadence_type']]
-						current_step = cadence['current_step']
-					
-						if current_step >= len(cadence_config['steps']):
-								continue
-					
-						step = cadence_config['steps'][current_step]
-						started = datetime.fromisoformat(cadence['started_at'])
-						last_action = datetime.fromisoformat(cadence['last_action_at']) if cadence['last_action_at'] else started
-					
-						days_since_last = (datetime.now(timezone.utc) - last_action).days
-					
-						if days_since_last >= step['day']:
-								self.execute_next_step(cadence['contact_id'])
-								executed += 1
-							
-				return executed
+				return len(to_update)
 	
 		def stop(self, contact_id: int, reason: str = 'manual_stop'):
 				"""Stop an active cadence"""
@@ -202,6 +250,18 @@ class SmartCadence:
 				print(f"✅ Stopped cadence for contact {contact_id} (reason: {reason})")
 			
 			
+def _compile_cadences(cadences):
+		"""Flatten CADENCES into step tables indexed by [type_id][step]"""
+		type_ids = {cadence_type: i for i, cadence_type in enumerate(cadences)}
+		step_days = tuple(tuple(step['day'] for step in c['steps']) for c in cadences.values())
+		step_actions = tuple(tuple(step['action'] for step in c['steps']) for c in cadences.values())
+		step_variants = tuple(tuple(step['variant'] for step in c['steps']) for c in cadences.values())
+		return type_ids, step_days, step_actions, step_variants
+	
+	
+CADENCE_TYPE_IDS, CADENCE_STEP_DAYS, CADENCE_STEP_ACTIONS, CADENCE_STEP_VARIANTS = _compile_cadences(SmartCadence.CADENCES)
+	
+	
 # CLI Interface
 if __name__ == "__main__":
 		import sys
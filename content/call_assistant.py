@@ -2,16 +2,65 @@
 
 # call_assistant.py - Interactive calling assistant with live script display
 
+import atexit
+import csv
 import sqlite3
 import sys
 from datetime import datetime
 import os
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+# Script generation runs in-process; without the generator's dependencies the
+# assistant falls back to DEFAULT_SCRIPT
+try:
+		from api.services.content.call_script_generator_unified import UnifiedCallScriptGenerator
+except ImportError:
+		UnifiedCallScriptGenerator = None
+
+DEFAULT_SCRIPT = """📞 OPENER:
+"Hi {firstname}, I know you're busy so I'll be brief..."
+
+🎯 HOOK / VALUE:
+"We help companies like {company} [specific benefit]."
+
+❓ DISCOVERY QUESTIONS:
+• "What's your current process for [area]?"
+• "What would make the biggest impact?"
+
+✅ CLOSE:
+"Would Tuesday 2pm or Wednesday 10am work better?"
+"""
 
 class CallAssistant:
 		"""Live call assistant - displays script as you dial"""
 	
 		def __init__(self, db_path='sales_angel.db'):
 				self.db_path = db_path
+				self._csv_fh = None
+				self._csv_writer = None
+				self._script_generator = None
+			
+		def _tracker_writer(self):
+				"""CSV writer on daily_tracker.csv, kept open for the whole session"""
+				if self._csv_writer is None:
+						self._csv_fh = open('daily_tracker.csv', 'a', newline='')
+						self._csv_writer = csv.writer(self._csv_fh)
+						atexit.register(self._csv_fh.close)
+				return self._csv_writer
+			
+		def _generate_script(self, contact, script_num):
+				"""Generate scripts in-process; default template if that fails"""
+				if UnifiedCallScriptGenerator is not None:
+						if self._script_generator is None:
+								self._script_generator = UnifiedCallScriptGenerator(self.db_path)
+						scripts = self._script_generator.generate_all_scripts(contact['id']) or {}
+						for variant, script in scripts.items():
+								contact[f'call_script_{variant}'] = script
+						if scripts.get(script_num):
+								return scripts[script_num]
+			
+				print("⚠️  Script generation unavailable - using default script")
+				return DEFAULT_SCRIPT.format(firstname=contact['firstname'], company=contact['company'])
 			
 		def get_contact(self, contact_id):
 				"""Get contact info and scripts"""
@@ -26,7 +75,14 @@ class CallAssistant:
 				""", (contact_id,)).fetchone()
 			
 				conn.close()
-				return dict(contact) if contact else None
+				if not contact:
+						return None
+			
+				contact = dict(contact)
+				# Truncated once here rather than on every redraw of the call screen
+				profile = contact['profile_content']
+				contact['_context'] = profile[:200] + "..." if profile and len(profile) > 200 else profile
+				return contact
 	
 		def prepare_call(self, contact_id, script_num=1):
 				"""Prepare for call - display contact info and script"""
@@ -36,6 +92,11 @@ class CallAssistant:
 						print(f"❌ Contact {contact_id} not found")
 						return None
 			
+				return self._render(contact, script_num)
+	
+		def _render(self, contact, script_num):
+				"""Draw the call screen for an already-fetched contact"""
+			
 				name = f"{contact['firstname']} {contact['lastname']}"
 			
 				# Clear screen for focus
@@ -53,22 +114,19 @@ class CallAssistant:
 				print(f"   Score: {contact['score']} | Tier: {contact['tier']}")
 			
 				# Quick context
-				if contact['profile_content']:
-						context = contact['profile_content'][:200] + "..." if len(contact['profile_content']) > 200 else contact['profile_content']
-						print(f"\n💡 Context: {context}")
-					
+				if contact['_context']:
+						print(f"\n💡 Context: {contact['_context']}")
+			
 				print("\n" + "="*80)
 				print(f"SCRIPT {script_num} - Ready to Read")
 				print("="*80 + "\n")
 			
 				# Display script
 				script = contact[f'call_script_{script_num}']
-				if script:
-						print(script)
-				else:
+				if not script:
 						print("⚠️  No script generated. Generating now...")
-						os.system(f"python call_script_generator.py {contact_id}")
-						return self.prepare_call(contact_id, script_num)
+						script = self._generate_script(contact, script_num)
+				print(script)
 			
 				print("\n" + "="*80)
 				print("READY TO DIAL")
@@ -79,52 +137,56 @@ class CallAssistant:
 		def call_flow(self, contact_id, script_num=1):
 				"""Interactive call workflow"""
 			
-				contact = self.prepare_call(contact_id, script_num)
+				# Fetched once; switching scripts or viewing the profile just redraws
+				contact = self.get_contact(contact_id)
 				if not contact:
+						print(f"❌ Contact {contact_id} not found")
 						return
 			
-				name = f"{contact['firstname']} {contact['lastname']}"
+				while True:
+						contact = self._render(contact, script_num)
+						if not contact:
+								return
+			
+						name = f"{contact['firstname']} {contact['lastname']}"
+			
+						# Prompt to dial
+						print("1️⃣  Dial number manually")
+						print("2️⃣  Use different script variant")
+						print("3️⃣  View profile intelligence")
+						print("❌ Cancel\n")
+			
+						choice = input("Choose action: ").strip()
+			
+						if choice == '1':
+								input("\n✅ Ready to dial? Press ENTER when connected...")
+			
+								# Post-call logging
+								print("\n" + "="*80)
+								print("CALL COMPLETE - Log Outcome")
+								print("="*80 + "\n")
+			
+								print("1️⃣  Connected - Good conversation")
+								print("2️⃣  Voicemail left")
+								print("3️⃣  No answer")
+								print("4️⃣  Wrong number / Do not call")
+								print("5️⃣  Meeting booked! 🎉")
+			
+								outcome = input("\nOutcome: ").strip()
+								notes = input("Notes: ").strip()
 			
-				# Prompt to dial
-				print("1️⃣  Dial number manually")
-				print("2️⃣  Use different script variant")
-				print("3️⃣  View profile intelligence")
-				print("❌ Cancel\n")
-			
-				choice = input("Choose action: ").strip()
-			
-				if choice == '1':
-						input("\n✅ Ready to dial? Press ENTER when connected...")
-					
-						# Post-call logging
-						print("\n" + "="*80)
-						print("CALL COMPLETE - Log Outcome")
-						print("="*80 + "\n")
-					
-						print("1️⃣  Connected - Good conversation")
-						print("2️⃣  Voicemail left")
-						print("3️⃣  No answer")
-						print("4️⃣  Wrong number / Do not call")
-						print("5️⃣  Meeting booked! 🎉")
-					
-						outcome = input("\nOutcome: ").strip()
-						notes = input("Notes: ").strip()
-					
-						outcomes = {
-								'1': 'Connected',
-								'2': 'Voicemail',
-								'3': 'No Answer',
-								'4': 'Wrong Number',
-								'5': 'Meeting Booked'
-						}
-					
-						outcome_text = outcomes.get(outcome, 'Call Made')
-					
-						# Log to tracker
-						with open('daily_tracker.csv', 'a', newline='') as f:
-								import csv
-								writer = csv.writer(f)
-								writer.writerow([
+								outcomes = {
+										'1': 'Connected',
+										'2': 'Voicemail',
+										'3': 'No Answer',
+										'4': 'Wrong Number',
+										'5': 'Meeting Booked'
+								}
+			
+								outcome_text = outcomes.get(outcome, 'Call Made')
+			
+								# Log to tracker
+								self._tracker_writer().writerow([
 										datetime.now().strftime('%Y-%m-%d'),
 										name,
 										contact['company'],
@@ -134,29 +196,34 @@ class CallAssistant:
 										notes,
 										'Follow-up in 2 days' if outcome in ['2', '3'] else 'Next step planned'
 								])
-							
-						print(f"\n✅ Call logged: {outcome_text}")
-					
-						if outcome == '5':
-								print("\n🎉 MEETING BOOKED! Great work!")
-								print("Don't forget to:")
-								print("  - Send calendar invite")
-								print("  - Prepare meeting agenda")
-								print("  - Research their specific needs")
-							
-				elif choice == '2':
-						new_script = input("Which script (1-3)? ").strip()
-						if new_script in ['1', '2', '3']:
-								self.call_flow(contact_id, int(new_script))
-							
-				elif choice == '3':
-						print("\n" + "="*80)
-						print("PROFILE INTELLIGENCE")
-						print("="*80 + "\n")
-						print(contact.get('profile_content', 'No intelligence available'))
-						input("\nPress ENTER to return to call screen...")
-						self.call_flow(contact_id, script_num)
-					
+								self._csv_fh.flush()
+			
+								print(f"\n✅ Call logged: {outcome_text}")
+			
+								if outcome == '5':
+										print("\n🎉 MEETING BOOKED! Great work!")
+										print("Don't forget to:")
+										print("  - Send calendar invite")
+										print("  - Prepare meeting agenda")
+										print("  - Research their specific needs")
+								return
+			
+						elif choice == '2':
+								new_script = input("Which script (1-3)? ").strip()
+								if new_script not in ['1', '2', '3']:
+										return
+								script_num = int(new_script)
+			
+						elif choice == '3':
+								print("\n" + "="*80)
+								print("PROFILE INTELLIGENCE")
+								print("="*80 + "\n")
+								print(contact.get('profile_content', 'No intelligence available'))
+								input("\nPress ENTER to return to call screen...")
+			
+						else:
+								return
+	
 		def quick_dial(self, contact_id):
 				"""Quick dial - just show number and basic script"""
 				contact = self.get_contact(contact_id)
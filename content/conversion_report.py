@@ -11,13 +11,67 @@ import sys
 import os
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
+import functools
+import hashlib
 import json
+import queue
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timedelta
 from collections import defaultdict
-from notion_client import Client as NotionClient
+from notion_client import APIErrorCode, APIResponseError, Client as NotionClient
+
+# orjson reads and writes the cached Notion responses faster than the
+# stdlib; fall back to json when it is not installed
+try:
+	import orjson
+	_json_loads = orjson.loads
+	_json_dumps = orjson.dumps
+except ImportError:
+	_json_loads = json.loads
+	
+	def _json_dumps(obj):
+		return json.dumps(obj).encode()
+
+# Notion property names read by the report
+LIFECYCLE = "Lifecycle Stage"
+LEAD_STATUS = "Lead Status"
+PERSONA = "Primary Persona Tier"
+CONVERSION_STAGE = "Conversion Stage"
+LAST_OUTREACH = "Last Outreach Generated"
+TOUCHPOINTS = "Total Touchpoints"
+REPORT_PROPERTIES = (LIFECYCLE, LEAD_STATUS, PERSONA, CONVERSION_STAGE, LAST_OUTREACH, TOUCHPOINTS)
+
+# Notion averages 3 requests/sec per integration
+NOTION_CONCURRENCY = 3
+NOTION_MAX_RETRIES = 5
+
+# Raw query responses are reused across report runs within the TTL
+NOTION_CACHE_DIR = os.path.join("data", ".notion_cache")
+NOTION_CACHE_TTL = 15 * 60
+
+# Lifecycle stages used to split the database into slices paged in parallel
+LIFECYCLE_STAGES = ("Subscriber", "Lead", "Mql", "Sql", "Opportunity", "Customer")
+
+
+@functools.lru_cache(maxsize=1)
+def load_config_file(config_path):
+	"""Parse config.json once per process"""
+	with open(config_path, 'rb') as f:
+		return _json_loads(f.read())
+
+
+def lifecycle_partitions():
+	"""Disjoint filters that together cover every page in the database"""
+	filters = [{"property": LIFECYCLE, "select": {"equals": stage}} for stage in LIFECYCLE_STAGES]
+	# Everything else, including pages with no stage set
+	filters.append({"and": [{"property": LIFECYCLE, "select": {"does_not_equal": stage}} for stage in LIFECYCLE_STAGES]})
+	return filters
+
 
 class ConversionReport:
-	def __init__(self):
+	def __init__(self, use_cache=True):
 		self.load_config()
 		self.notion = NotionClient(auth=self.config["NOTION_API_KEY"])
 		
@@ -26,79 +80,165 @@ class ConversionReport:
 			self.config.get("NOTION_DATABASE_ID") or
 			self.config.get("NOTION_CONTACTS_DATABASE_ID")
 		)
+		if not self.db_id:
+			raise KeyError("config.json needs NOTION_DB_ID, NOTION_DATABASE_ID or NOTION_CONTACTS_DATABASE_ID")
+		
+		self.use_cache = use_cache
+		self.api_calls = 0
+		self.cache_hits = 0
+		self._stats_lock = threading.Lock()
 		
 	def load_config(self):
 		"""Load configuration"""
 		config_path = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'config.json')
-		with open(config_path, 'r') as f:
-			self.config = json.load(f)
+		self.config = load_config_file(config_path)
 			
-	def get_all_contacts(self):
-		"""Get all contacts from Notion"""
-		print("📊 Fetching contacts from Notion...")
+	def query_database(self, **query_params):
+		"""Query the contacts database, serving fresh responses from the disk cache"""
+		return self._cached_call("query", query_params, self.notion.databases.query)
+		
+	def report_property_ids(self):
+		"""Notion ids of REPORT_PROPERTIES, so queries return only what the report counts"""
+		schema = self._cached_call("schema", {}, self.notion.databases.retrieve)["properties"]
+		return [schema[name]["id"] for name in REPORT_PROPERTIES if name in schema]
 		
-		contacts = []
+	def _cached_call(self, kind, params, endpoint):
+		"""Call a Notion database endpoint through the disk cache"""
+		key = json.dumps([kind, self.db_id, params], sort_keys=True)
+		cache_path = os.path.join(NOTION_CACHE_DIR, hashlib.blake2b(key.encode(), digest_size=16).hexdigest() + ".json")
+		
+		if self.use_cache:
+			try:
+				if time.time() - os.path.getmtime(cache_path) < NOTION_CACHE_TTL:
+					with open(cache_path, 'rb') as f:
+						response = _json_loads(f.read())
+					with self._stats_lock:
+						self.cache_hits += 1
+					return response
+			except (OSError, ValueError):
+				pass
+				
+		response = self._with_backoff(endpoint, **params)
+		with self._stats_lock:
+			self.api_calls += 1
+			
+		# Write then rename so a concurrent run never reads a partial file
+		os.makedirs(NOTION_CACHE_DIR, exist_ok=True)
+		tmp_path = f"{cache_path}.{threading.get_ident()}.tmp"
+		with open(tmp_path, 'wb') as f:
+			f.write(_json_dumps(response))
+		os.replace(tmp_path, cache_path)
+		return response
+		
+	def _with_backoff(self, endpoint, **params):
+		"""Call Notion, backing off when it rate limits us"""
+		for attempt in range(NOTION_MAX_RETRIES):
+			try:
+				return endpoint(database_id=self.db_id, **params)
+			except APIResponseError as e:
+				if e.code != APIErrorCode.RateLimited or attempt == NOTION_MAX_RETRIES - 1:
+					raise
+				time.sleep(2 ** attempt)
+				
+	def fetch_partition(self, query_filter, property_ids, results):
+		"""Page through one filtered slice, handing each batch of pages to results"""
 		has_more = True
 		start_cursor = None
 		
-		while has_more:
-			query_params = {
-				"database_id": self.db_id,
-				"page_size": 100
-			}
-			
-			if start_cursor:
-				query_params["start_cursor"] = start_cursor
+		try:
+			while has_more:
+				query_params = {
+					"filter": query_filter,
+					"filter_properties": property_ids,
+					"page_size": 100
+				}
 				
-			response = self.notion.databases.query(**query_params)
-			contacts.extend(response["results"])
+				if start_cursor:
+					query_params["start_cursor"] = start_cursor
+					
+				response = self.query_database(**query_params)
+				results.put(response["results"])
+				
+				has_more = response["has_more"]
+				start_cursor = response.get("next_cursor")
+		finally:
+			# Tell iter_contacts this slice is finished, even on error
+			results.put(None)
 			
-			has_more = response["has_more"]
-			start_cursor = response.get("next_cursor")
+	def iter_contacts(self):
+		"""Yield contacts from Notion, paging the lifecycle slices concurrently"""
+		print("📊 Fetching contacts from Notion...")
+		
+		loaded = 0
+		partitions = lifecycle_partitions()
+		property_ids = self.report_property_ids()
+		results = queue.Queue()
+		
+		with ThreadPoolExecutor(max_workers=NOTION_CONCURRENCY) as pool:
+			futures = [pool.submit(self.fetch_partition, f, property_ids, results) for f in partitions]
 			
-		print(f"✅ Loaded {len(contacts)} contacts")
-		return contacts
+			remaining = len(futures)
+			while remaining:
+				batch = results.get()
+				if batch is None:
+					remaining -= 1
+					continue
+				loaded += len(batch)
+				yield from batch
+				
+			# Surface any worker failure instead of reporting partial counts
+			for future in futures:
+				future.result()
+				
+		print(f"✅ Loaded {loaded} contacts ({self.api_calls} API calls, {self.cache_hits} from cache)")
 	
 	def analyze_contacts(self, contacts):
-		"""Analyze contacts and group by various metrics"""
-		by_lifecycle = defaultdict(list)
-		by_lead_status = defaultdict(list)
-		by_persona = defaultdict(list)
-		by_conversion_stage = defaultdict(list)
+		"""Count contacts by various metrics in a single pass"""
+		by_lifecycle = defaultdict(int)
+		by_lead_status = defaultdict(int)
+		by_persona = defaultdict(int)
+		by_conversion_stage = defaultdict(int)
 		
+		total = 0
 		total_outreach = 0
 		with_activities = 0
 		
 		for page in contacts:
+			total += 1
 			props = page["properties"]
 			
 			# Lifecycle Stage
-			lifecycle = props.get("Lifecycle Stage", {}).get("select")
+			prop = props.get(LIFECYCLE)
+			lifecycle = prop and prop.get("select")
 			if lifecycle:
-				by_lifecycle[lifecycle.get("name", "Unknown")].append(page)
+				by_lifecycle[lifecycle.get("name", "Unknown")] += 1
 				
 			# Lead Status
-			lead_status = props.get("Lead Status", {}).get("select")
+			prop = props.get(LEAD_STATUS)
+			lead_status = prop and prop.get("select")
 			if lead_status:
-				by_lead_status[lead_status.get("name", "Unknown")].append(page)
+				by_lead_status[lead_status.get("name", "Unknown")] += 1
 				
 			# Primary Persona
-			persona = props.get("Primary Persona Tier", {}).get("select")
+			prop = props.get(PERSONA)
+			persona = prop and prop.get("select")
 			if persona:
-				by_persona[persona.get("name", "Unknown")].append(page)
+				by_persona[persona.get("name", "Unknown")] += 1
 				
 			# Conversion Stage
-			conversion = props.get("Conversion Stage", {}).get("select")
+			prop = props.get(CONVERSION_STAGE)
+			conversion = prop and prop.get("select")
 			if conversion:
-				by_conversion_stage[conversion.get("name", "Unknown")].append(page)
+				by_conversion_stage[conversion.get("name", "Unknown")] += 1
 				
 			# Count outreach sent
-			outreach_date = props.get("Last Outreach Generated", {}).get("date")
-			if outreach_date:
+			prop = props.get(LAST_OUTREACH)
+			if prop and prop.get("date"):
 				total_outreach += 1
 				
 			# Count contacts with activities
-			activities = props.get("Total Touchpoints", {}).get("number")
+			prop = props.get(TOUCHPOINTS)
+			activities = prop and prop.get("number")
 			if activities and activities > 0:
 				with_activities += 1
 				
@@ -107,7 +247,7 @@ class ConversionReport:
 			"lead_status": by_lead_status,
 			"persona": by_persona,
 			"conversion_stage": by_conversion_stage,
-			"total": len(contacts),
+			"total": total,
 			"total_outreach": total_outreach,
 			"with_activities": with_activities
 		}
@@ -119,19 +259,19 @@ class ConversionReport:
 		
 		# Lifecycle funnel
 		total = data["total"]
-		subscriber = len(lifecycle.get("Subscriber", []))
-		lead = len(lifecycle.get("Lead", []))
-		mql = len(lifecycle.get("Mql", []))
-		sql = len(lifecycle.get("Sql", []))
-		opportunity = len(lifecycle.get("Opportunity", []))
-		customer = len(lifecycle.get("Customer", []))
+		subscriber = lifecycle.get("Subscriber", 0)
+		lead = lifecycle.get("Lead", 0)
+		mql = lifecycle.get("Mql", 0)
+		sql = lifecycle.get("Sql", 0)
+		opportunity = lifecycle.get("Opportunity", 0)
+		customer = lifecycle.get("Customer", 0)
 		
 		# Lead status funnel
-		new_leads = len(lead_status.get("New", []))
-		open_leads = len(lead_status.get("Open", []))
-		contacted = len(lead_status.get("Contacted", []))
-		engaged = len(lead_status.get("Engaged", []))
-		qualified = len(lead_status.get("Qualified", []))
+		new_leads = lead_status.get("New", 0)
+		open_leads = lead_status.get("Open", 0)
+		contacted = lead_status.get("Contacted", 0)
+		engaged = lead_status.get("Engaged", 0)
+		qualified = lead_status.get("Qualified", 0)
 		
 		# Total leads (any status)
 		total_leads = lead + mql + sql
@@ -169,114 +309,128 @@ class ConversionReport:
 		print("=" * 70)
 		
 		# Get data
-		contacts = self.get_all_contacts()
-		data = self.analyze_contacts(contacts)
+		data = self.analyze_contacts(self.iter_contacts())
 		metrics = self.calculate_conversion_rates(data)
 		
+		# Ranked once, shared by the console and markdown output
+		persona_sorted = self.rank_counts(data["persona"])
+		stage_sorted = self.rank_counts(data["conversion_stage"])
+		
+		# Assemble the console report and write it in one go
+		out = []
+		
 		# Overview
-		print(f"\n### Overview\n")
-		print(f"Total Contacts: {data['total']}")
-		print(f"Outreach Sent: {data['total_outreach']}")
-		print(f"With Activities: {data['with_activities']}")
-		print(f"Activity Rate: {(data['with_activities'] / data['total'] * 100):.1f}%")
+		out.append(f"\n### Overview\n")
+		out.append(f"Total Contacts: {data['total']}")
+		out.append(f"Outreach Sent: {data['total_outreach']}")
+		out.append(f"With Activities: {data['with_activities']}")
+		out.append(f"Activity Rate: {(data['with_activities'] / data['total'] * 100):.1f}%")
 		
 		# Lifecycle Stage Funnel
-		print(f"\n### Lifecycle Stage Funnel\n")
+		out.append(f"\n### Lifecycle Stage Funnel\n")
 		lc = metrics["lifecycle"]
-		print(f"Subscriber: {lc['subscriber']}")
-		print(f"Lead: {lc['lead']}")
-		print(f"MQL: {lc['mql']}")
-		print(f"SQL: {lc['sql']}")
-		print(f"Opportunity: {lc['opportunity']} ({lc['opp_rate']:.1f}% conversion from leads)")
-		print(f"Customer: {lc['customer']} ({lc['close_rate']:.1f}% close rate)")
+		out.append(f"Subscriber: {lc['subscriber']}")
+		out.append(f"Lead: {lc['lead']}")
+		out.append(f"MQL: {lc['mql']}")
+		out.append(f"SQL: {lc['sql']}")
+		out.append(f"Opportunity: {lc['opportunity']} ({lc['opp_rate']:.1f}% conversion from leads)")
+		out.append(f"Customer: {lc['customer']} ({lc['close_rate']:.1f}% close rate)")
 		
 		# Lead Status Funnel
-		print(f"\n### Lead Status Progression\n")
+		out.append(f"\n### Lead Status Progression\n")
 		ls = metrics["lead_status"]
-		print(f"New: {ls['new']}")
-		print(f"Open: {ls['open']}")
-		print(f"Contacted: {ls['contacted']} ({ls['contact_rate']:.1f}% of new)")
-		print(f"Engaged: {ls['engaged']} ({ls['engage_rate']:.1f}% of contacted)")
-		print(f"Qualified: {ls['qualified']} ({ls['qualify_rate']:.1f}% of engaged)")
+		out.append(f"New: {ls['new']}")
+		out.append(f"Open: {ls['open']}")
+		out.append(f"Contacted: {ls['contacted']} ({ls['contact_rate']:.1f}% of new)")
+		out.append(f"Engaged: {ls['engaged']} ({ls['engage_rate']:.1f}% of contacted)")
+		out.append(f"Qualified: {ls['qualified']} ({ls['qualify_rate']:.1f}% of engaged)")
 		
 		# Persona Breakdown
-		print(f"\n### Performance by Persona\n")
-		for persona, contacts in sorted(data["persona"].items(), key=lambda x: len(x[1]), reverse=True):
-			if persona != "Unknown" and len(contacts) > 0:
-				print(f"{persona}: {len(contacts)} contacts")
+		out.append(f"\n### Performance by Persona\n")
+		for persona, count in persona_sorted:
+			out.append(f"{persona}: {count} contacts")
 				
 		# Conversion Stage Distribution
-		print(f"\n### Conversion Stage Distribution\n")
-		for stage, contacts in sorted(data["conversion_stage"].items(), key=lambda x: len(x[1]), reverse=True):
-			if stage != "Unknown" and len(contacts) > 0:
-				pct = (len(contacts) / data['total'] * 100)
-				print(f"{stage}: {len(contacts)} ({pct:.1f}%)")
+		out.append(f"\n### Conversion Stage Distribution\n")
+		for stage, count in stage_sorted:
+			pct = (count / data['total'] * 100)
+			out.append(f"{stage}: {count} ({pct:.1f}%)")
 				
 		# Export to markdown
-		self.export_markdown_report(metrics, data)
+		self.export_markdown_report(metrics, data, persona_sorted, stage_sorted)
 		
-		print(f"\n" + "=" * 70)
-		print(f"✅ Report exported: data/conversion_report_{datetime.now().strftime('%Y-%m-%d')}.md")
-		print("=" * 70)
+		out.append(f"\n" + "=" * 70)
+		out.append(f"✅ Report exported: data/conversion_report_{datetime.now().strftime('%Y-%m-%d')}.md")
+		out.append("=" * 70)
+		sys.stdout.write("\n".join(out) + "\n")
+		sys.stdout.flush()
 		
-	def export_markdown_report(self, metrics, data):
+	def rank_counts(self, counts):
+		"""(name, count) pairs, largest first, without Unknown or empty buckets"""
+		ranked = [(name, count) for name, count in counts.items() if name != "Unknown" and count > 0]
+		ranked.sort(key=lambda x: x[1], reverse=True)
+		return ranked
+		
+	def export_markdown_report(self, metrics, data, persona_sorted, stage_sorted):
 		"""Export report to markdown file"""
 		filepath = f"data/conversion_report_{datetime.now().strftime('%Y-%m-%d')}.md"
 		
+		parts = []
+		parts.append(f"# Conversion Metrics Report\n\n")
+		parts.append(f"**Generated:** {datetime.now().strftime('%B %d, %Y at %I:%M %p')}  \n")
+		parts.append(f"**Total Contacts:** {data['total']}  \n")
+		parts.append(f"**Outreach Sent:** {data['total_outreach']}  \n\n")
+		
+		parts.append("---\n\n")
+		
+		# Lifecycle funnel
+		parts.append("## Lifecycle Stage Funnel\n\n")
+		lc = metrics["lifecycle"]
+		parts.append(f"- **Subscriber:** {lc['subscriber']}\n")
+		parts.append(f"- **Lead:** {lc['lead']}\n")
+		parts.append(f"- **MQL:** {lc['mql']}\n")
+		parts.append(f"- **SQL:** {lc['sql']}\n")
+		parts.append(f"- **Opportunity:** {lc['opportunity']} ({lc['opp_rate']:.1f}% conversion)\n")
+		parts.append(f"- **Customer:** {lc['customer']} ({lc['close_rate']:.1f}% close rate)\n\n")
+		
+		# Lead status
+		parts.append("## Lead Status Progression\n\n")
+		ls = metrics["lead_status"]
+		parts.append(f"- **New:** {ls['new']}\n")
+		parts.append(f"- **Open:** {ls['open']}\n")
+		parts.append(f"- **Contacted:** {ls['contacted']} ({ls['contact_rate']:.1f}% of new)\n")
+		parts.append(f"- **Engaged:** {ls['engaged']} ({ls['engage_rate']:.1f}% of contacted)\n")
+		parts.append(f"- **Qualified:** {ls['qualified']} ({ls['qualify_rate']:.1f}% of engaged)\n\n")
+		
+		# Persona breakdown
+		parts.append("## Performance by Persona\n\n")
+		for persona, count in persona_sorted:
+			parts.append(f"- **{persona}:** {count} contacts\n")
+				
+		parts.append("\n")
+		
+		# Conversion stages
+		parts.append("## Conversion Stage Distribution\n\n")
+		for stage, count in stage_sorted:
+			pct = (count / data['total'] * 100)
+			parts.append(f"- **{stage}:** {count} ({pct:.1f}%)\n")
+				
+		parts.append("\n---\n\n")
+		parts.append("*Generated automatically by Phase 2: Response Tracking System*\n")
+		
 		with open(filepath, 'w') as f:
-			f.write(f"# Conversion Metrics Report\n\n")
-			f.write(f"**Generated:** {datetime.now().strftime('%B %d, %Y at %I:%M %p')}  \n")
-			f.write(f"**Total Contacts:** {data['total']}  \n")
-			f.write(f"**Outreach Sent:** {data['total_outreach']}  \n\n")
-			
-			f.write("---\n\n")
-			
-			# Lifecycle funnel
-			f.write("## Lifecycle Stage Funnel\n\n")
-			lc = metrics["lifecycle"]
-			f.write(f"- **Subscriber:** {lc['subscriber']}\n")
-			f.write(f"- **Lead:** {lc['lead']}\n")
-			f.write(f"- **MQL:** {lc['mql']}\n")
-			f.write(f"- **SQL:** {lc['sql']}\n")
-			f.write(f"- **Opportunity:** {lc['opportunity']} ({lc['opp_rate']:.1f}% conversion)\n")
-			f.write(f"- **Customer:** {lc['customer']} ({lc['close_rate']:.1f}% close rate)\n\n")
-			
-			# Lead status
-			f.write("## Lead Status Progression\n\n")
-			ls = metrics["lead_status"]
-			f.write(f"- **New:** {ls['new']}\n")
-			f.write(f"- **Open:** {ls['open']}\n")
-			f.write(f"- **Contacted:** {ls['contacted']} ({ls['contact_rate']:.1f}% of new)\n")
-			f.write(f"- **Engaged:** {ls['engaged']} ({ls['engage_rate']:.1f}% of contacted)\n")
-			f.write(f"- **Qualified:** {ls['qualified']} ({ls['qualify_rate']:.1f}% of engaged)\n\n")
-			
-			# Persona breakdown
-			f.write("## Performance by Persona\n\n")
-			for persona, contacts in sorted(data["persona"].items(), key=lambda x: len(x[1]), reverse=True):
-				if persona != "Unknown" and len(contacts) > 0:
-					f.write(f"- **{persona}:** {len(contacts)} contacts\n")
-					
-			f.write("\n")
-			
-			# Conversion stages
-			f.write("## Conversion Stage Distribution\n\n")
-			for stage, contacts in sorted(data["conversion_stage"].items(), key=lambda x: len(x[1]), reverse=True):
-				if stage != "Unknown" and len(contacts) > 0:
-					pct = (len(contacts) / data['total'] * 100)
-					f.write(f"- **{stage}:** {len(contacts)} ({pct:.1f}%)\n")
-					
-			f.write("\n---\n\n")
-			f.write("*Generated automatically by Phase 2: Response Tracking System*\n")
-			
-			
+			f.write("".join(parts))
+		
+		
 def main():
 	import argparse
 	parser = argparse.ArgumentParser(description="Generate conversion metrics report")
 	parser.add_argument("--days", type=int, default=7, help="Report period in days (not used currently)")
+	parser.add_argument("--no-cache", action="store_true", help="Ignore cached Notion responses and refetch")
 	
 	args = parser.parse_args()
 	
-	reporter = ConversionReport()
+	reporter = ConversionReport(use_cache=not args.no_cache)
 	reporter.generate_report(args.days)
 	
 	
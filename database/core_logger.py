@@ -5,9 +5,28 @@ Structured logging with JSON output and Sentry integration
 import logging
 import structlog
 import sys
-from datetime import datetime
+from time import perf_counter
 from typing import Any, Dict
 
+# Configure structlog once, when this module is first imported
+structlog.configure(
+    processors=[
+        structlog.stdlib.filter_by_level,
+        structlog.stdlib.add_logger_name,
+        structlog.stdlib.add_log_level,
+        structlog.stdlib.PositionalArgumentsFormatter(),
+        structlog.processors.TimeStamper(fmt="iso"),
+        structlog.processors.StackInfoRenderer(),
+        structlog.processors.format_exc_info,
+        structlog.processors.UnicodeDecoder(),
+        structlog.processors.JSONRenderer()
+    ],
+    context_class=dict,
+    logger_factory=structlog.stdlib.LoggerFactory(),
+    cache_logger_on_first_use=True,
+)
+
+
 def get_logger(name: str) -> structlog.BoundLogger:
     """
     Get a structured logger instance
@@ -18,29 +37,7 @@ def get_logger(name: str) -> structlog.BoundLogger:
     Returns:
         Configured structlog logger
     """
-
-    # Configure structlog
-    structlog.configure(
-        processors=[
-            structlog.stdlib.filter_by_level,
-            structlog.stdlib.add_logger_name,
-            structlog.stdlib.add_log_level,
-            structlog.stdlib.PositionalArgumentsFormatter(),
-            structlog.processors.TimeStamper(fmt="iso"),
-            structlog.processors.StackInfoRenderer(),
-            structlog.processors.format_exc_info,
-            structlog.processors.UnicodeDecoder(),
-            structlog.processors.JSONRenderer()
-        ],
-        context_class=dict,
-        logger_factory=structlog.stdlib.LoggerFactory(),
-        cache_logger_on_first_use=True,
-    )
-
-    # Get logger
-    logger = structlog.get_logger(name)
-
-    return logger
+    return structlog.get_logger(name)
 
 
 class PerformanceLogger:
@@ -52,12 +49,13 @@ class PerformanceLogger:
         self.start_time = None
 
     def __enter__(self):
-        self.start_time = datetime.now()
+        # Monotonic, high-resolution clock; wall-clock stamps come from TimeStamper
+        self.start_time = perf_counter()
         self.logger.info(f"Starting: {self.operation}")
         return self
 
     def __exit__(self, exc_type, exc_val, exc_tb):
-        duration = (datetime.now() - self.start_time).total_seconds()
+        duration = perf_counter() - self.start_time
 
         if exc_type is None:
             self.logger.info(
@@ -6,250 +6,388 @@ Manages all database operations, schemas, and content storage
 
 import sqlite3
 import json
+import threading
 from datetime import datetime
 from typing import Dict, List, Any, Optional
 
+# Hot statements kept as constants so every call sends identical SQL text
+# and reuses the connection's prepared statement
+
+# Duplicate emails are skipped by the UNIQUE constraint rather than raised
+SQL_INSERT_CONTACT = """
+    INSERT OR IGNORE INTO contacts
+    (firstname, lastname, email, phone, company, jobtitle, mbti, disc, score,
+     hubspot_id, lifecycle_stage, source)
+    VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+"""
+
+SQL_CONTACT_BY_EMAIL = """
+    SELECT id, firstname, lastname, email, company, jobtitle, enriched_profile
+    FROM contacts
+    WHERE email = ?
+"""
+
+SQL_CONTACT_BY_ID = """
+    SELECT id, firstname, lastname, email, company, jobtitle, enriched_profile
+    FROM contacts
+    WHERE id = ?
+"""
+
+SQL_QUALITY = """
+    SELECT COUNT(*) as total,
+           SUM(CASE WHEN user_action = 'accepted' THEN 1 ELSE 0 END) as accepted
+    FROM ml_feedback
+    WHERE style = ?
+"""
+
+# Accept/reject stamp different columns; one fixed statement for each
+SQL_UPDATE_ACCEPTED = """
+    UPDATE generated_content
+    SET status = ?, accepted_at = CURRENT_TIMESTAMP
+    WHERE id = ?
+"""
+
+SQL_UPDATE_REJECTED = """
+    UPDATE generated_content
+    SET status = ?, rejected_at = CURRENT_TIMESTAMP
+    WHERE id = ?
+"""
+
+SQL_INSERT_FEEDBACK = """
+    INSERT INTO ml_feedback (content_id, contact_id, user_action, reasoning, variant_num, style)
+    VALUES (?, ?, ?, ?, ?, ?)
+"""
+
+# Full schema, applied as one transaction by init_db()
+SCHEMA = """
+    BEGIN;
+
+    -- Contacts table
+    CREATE TABLE IF NOT EXISTS contacts (
+        id INTEGER PRIMARY KEY,
+        firstname TEXT,
+        lastname TEXT,
+        email TEXT UNIQUE,
+        phone TEXT,
+        company TEXT,
+        jobtitle TEXT,
+        mbti TEXT,
+        disc TEXT,
+        score REAL,
+        hubspot_id TEXT,
+        enriched_profile TEXT,
+        enriched_at TIMESTAMP,
+        enrichment_cost REAL,
+        lifecycle_stage TEXT,
+        source TEXT DEFAULT 'manual',
+        created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+    );
+
+    -- Generated content table (emails + calls)
+    CREATE TABLE IF NOT EXISTS generated_content (
+        id INTEGER PRIMARY KEY,
+        contact_id INTEGER NOT NULL,
+        content_type TEXT NOT NULL,
+        variant_num INTEGER,
+        style TEXT,
+        subject TEXT,
+        body TEXT,
+        lines TEXT,
+        cta TEXT,
+        objections TEXT,
+        generated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+        status TEXT DEFAULT 'pending',
+        feedback_score INTEGER,
+        user_rating INTEGER,
+        user_notes TEXT,
+        accepted_at TIMESTAMP,
+        rejected_at TIMESTAMP,
+        FOREIGN KEY(contact_id) REFERENCES contacts(id)
+    );
+
+    -- ML Training data
+    CREATE TABLE IF NOT EXISTS ml_feedback (
+        id INTEGER PRIMARY KEY,
+        content_id INTEGER NOT NULL,
+        contact_id INTEGER NOT NULL,
+        user_action TEXT NOT NULL,
+        reasoning TEXT,
+        variant_num INTEGER,
+        style TEXT,
+        key_factors TEXT,
+        feedback_timestamp TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+        FOREIGN KEY(content_id) REFERENCES generated_content(id),
+        FOREIGN KEY(contact_id) REFERENCES contacts(id)
+    );
+
+    -- Model metrics table
+    CREATE TABLE IF NOT EXISTS ml_metrics (
+        id INTEGER PRIMARY KEY,
+        metric_date TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+        total_generated INTEGER,
+        total_accepted INTEGER,
+        total_rejected INTEGER,
+        acceptance_rate REAL,
+        avg_feedback_score REAL,
+        model_accuracy REAL
+    );
+
+    -- Per-style and per-variant acceptance, aggregated by SQLite for train()
+    CREATE VIEW IF NOT EXISTS ml_style_scores AS
+    SELECT style,
+           COUNT(*) as total,
+           SUM(CASE WHEN user_action = 'accepted' THEN 1 ELSE 0 END) as accepted,
+           AVG(CASE WHEN user_action = 'accepted' THEN 1.0 ELSE 0 END) as acceptance_rate
+    FROM ml_feedback
+    GROUP BY style;
+
+    CREATE VIEW IF NOT EXISTS ml_variant_scores AS
+    SELECT variant_num,
+           COUNT(*) as total,
+           SUM(CASE WHEN user_action = 'accepted' THEN 1 ELSE 0 END) as accepted,
+           AVG(CASE WHEN user_action = 'accepted' THEN 1.0 ELSE 0 END) as acceptance_rate
+    FROM ml_feedback
+    GROUP BY variant_num;
+
+    -- Indexes for the feedback, pending-review and contact-listing lookups
+    CREATE INDEX IF NOT EXISTS idx_feedback_style ON ml_feedback(style);
+    CREATE INDEX IF NOT EXISTS idx_feedback_variant ON ml_feedback(variant_num);
+    CREATE INDEX IF NOT EXISTS idx_content_pending ON generated_content(status, contact_id, generated_at DESC);
+    CREATE INDEX IF NOT EXISTS idx_contacts_created ON contacts(created_at DESC);
+
+    COMMIT;
+"""
+
+SCHEMA_INDEXES = ('idx_feedback_style', 'idx_feedback_variant', 'idx_content_pending', 'idx_contacts_created')
+
+# Contacts are mirrored in memory up to this many rows; larger tables are
+# always read from SQLite
+CONTACT_CACHE_MAX_ROWS = 50000
+
+def _json_or_none(value: Any) -> Optional[str]:
+    """Compact JSON for a non-empty value; NULL in the database otherwise"""
+    return json.dumps(value, separators=(',', ':'), ensure_ascii=False) if value else None
+
 class SalesAngelDB:
     """Main database interface for Sales Angel"""
     
     def __init__(self, db_path: str = "sales_angel.db"):
         self.db_path = db_path
+        # One connection for the object's lifetime; the lock serializes use
+        # across threads so transactions never interleave
+        self.conn = self._connect()
+        self._lock = threading.Lock()
+        # Bumped on every feedback write; get_ml_features() reuses its last
+        # result while the version it was computed at is still current
+        self._feedback_version = 0
+        self._ml_features_cache = (None, None)
         self.init_db()
+        self._load_contact_cache()
+    
+    def close(self):
+        # Fold the WAL back into the database and shrink it before exiting
+        with self._lock:
+            self.conn.execute("PRAGMA wal_checkpoint(TRUNCATE)")
+            self.conn.close()
+    
+    def _connect(self) -> sqlite3.Connection:
+        """Open a connection with the per-connection performance pragmas applied"""
+        # The connection lives as long as the object, so its prepared-statement
+        # cache stays warm; size it well above the number of distinct queries
+        conn = sqlite3.connect(self.db_path, check_same_thread=False, cached_statements=256)
+        conn.row_factory = sqlite3.Row
+        # Safe with WAL: a crash can lose the last commits but never corrupts
+        conn.execute("PRAGMA synchronous=NORMAL")
+        conn.execute("PRAGMA temp_store=MEMORY")
+        conn.execute("PRAGMA mmap_size=30000000000")
+        conn.execute("PRAGMA cache_size=-64000")  # 64 MB page cache
+        conn.execute("PRAGMA busy_timeout=5000")
+        # Checkpoint less often so feedback commits rarely stall on one, and
+        # cap the WAL file at 64 MB once a checkpoint has run
+        conn.execute("PRAGMA wal_autocheckpoint=10000")
+        conn.execute("PRAGMA journal_size_limit=67108864")
+        return conn
     
     def init_db(self):
         """Initialize database schema"""
-        conn = sqlite3.connect(self.db_path)
-        cursor = conn.cursor()
-        
-        # Contacts table
-        cursor.execute("""
-            CREATE TABLE IF NOT EXISTS contacts (
-                id INTEGER PRIMARY KEY,
-                firstname TEXT,
-                lastname TEXT,
-                email TEXT UNIQUE,
-                phone TEXT,
-                company TEXT,
-                jobtitle TEXT,
-                mbti TEXT,
-                disc TEXT,
-                score REAL,
-                hubspot_id TEXT,
-                enriched_profile TEXT,
-                enriched_at TIMESTAMP,
-                enrichment_cost REAL,
-                lifecycle_stage TEXT,
-                source TEXT DEFAULT 'manual',
-                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-            )
-        """)
-        
-        # Generated content table (emails + calls)
-        cursor.execute("""
-            CREATE TABLE IF NOT EXISTS generated_content (
-                id INTEGER PRIMARY KEY,
-                contact_id INTEGER NOT NULL,
-                content_type TEXT NOT NULL,
-                variant_num INTEGER,
-                style TEXT,
-                subject TEXT,
-                body TEXT,
-                lines TEXT,
-                cta TEXT,
-                objections TEXT,
-                generated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                status TEXT DEFAULT 'pending',
-                feedback_score INTEGER,
-                user_rating INTEGER,
-                user_notes TEXT,
-                accepted_at TIMESTAMP,
-                rejected_at TIMESTAMP,
-                FOREIGN KEY(contact_id) REFERENCES contacts(id)
-            )
-        """)
+        conn = self.conn
+        # WAL persists in the database file, so every later connection uses it
+        conn.execute("PRAGMA journal_mode=WAL")
         
-        # ML Training data
-        cursor.execute("""
-            CREATE TABLE IF NOT EXISTS ml_feedback (
-                id INTEGER PRIMARY KEY,
-                content_id INTEGER NOT NULL,
-                contact_id INTEGER NOT NULL,
-                user_action TEXT NOT NULL,
-                reasoning TEXT,
-                variant_num INTEGER,
-                style TEXT,
-                key_factors TEXT,
-                feedback_timestamp TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                FOREIGN KEY(content_id) REFERENCES generated_content(id),
-                FOREIGN KEY(contact_id) REFERENCES contacts(id)
-            )
-        """)
+        # Note which indexes exist so planner statistics are refreshed once
+        existing = {row[0] for row in conn.execute("SELECT name FROM sqlite_master WHERE type = 'index'")}
         
-        # Model metrics table
-        cursor.execute("""
-            CREATE TABLE IF NOT EXISTS ml_metrics (
-                id INTEGER PRIMARY KEY,
-                metric_date TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                total_generated INTEGER,
-                total_accepted INTEGER,
-                total_rejected INTEGER,
-                acceptance_rate REAL,
-                avg_feedback_score REAL,
-                model_accuracy REAL
-            )
-        """)
+        # executescript() commits anything pending first; the script's own
+        # BEGIN/COMMIT applies every table, view and index atomically
+        conn.executescript(SCHEMA)
         
-        conn.commit()
-        conn.close()
+        # Refresh planner statistics once, when the indexes are first created
+        if not existing.issuperset(SCHEMA_INDEXES):
+            conn.execute("ANALYZE")
+    
+    @staticmethod
+    def _contact_row(contact_data: Dict[str, Any]) -> tuple:
+        """Parameters for SQL_INSERT_CONTACT"""
+        return (
+            contact_data.get('firstname'),
+            contact_data.get('lastname'),
+            contact_data.get('email'),
+            contact_data.get('phone'),
+            contact_data.get('company'),
+            contact_data.get('jobtitle'),
+            contact_data.get('mbti'),
+            contact_data.get('disc'),
+            contact_data.get('score', 0),
+            contact_data.get('hubspot_id'),
+            contact_data.get('lifecycle_stage'),
+            contact_data.get('source', 'manual')
+        )
+    
+    def _load_contact_cache(self):
+        """Mirror the contacts table in id/email dicts when it is small enough"""
+        with self._lock:
+            self._data_version = self._current_data_version()
+            rows = self.conn.execute("""
+                SELECT id, firstname, lastname, email, company, jobtitle, enriched_profile
+                FROM contacts
+                LIMIT ?
+            """, (CONTACT_CACHE_MAX_ROWS + 1,)).fetchall()
+            
+            if len(rows) > CONTACT_CACHE_MAX_ROWS:
+                self._contact_by_id = self._contact_by_email = None
+                return
+            
+            self._contact_by_id = {}
+            self._contact_by_email = {}
+            for row in rows:
+                self._cache_contact(dict(row))
+    
+    def _current_data_version(self) -> int:
+        """Counter SQLite bumps whenever another connection commits"""
+        return self.conn.execute("PRAGMA data_version").fetchone()[0]
+    
+    def _cache_contact(self, contact: Dict[str, Any]):
+        """Store a contact in the in-memory lookups (caller holds the lock)"""
+        if self._contact_by_id is None:
+            return
+        self._contact_by_id[contact['id']] = contact
+        if contact['email'] is not None:
+            self._contact_by_email[contact['email']] = contact
+    
+    def _lookup_contact(self, cache: Optional[Dict], sql: str, key: Any) -> Optional[Dict]:
+        """Contact from the in-memory lookup, falling back to SQLite on a miss"""
+        with self._lock:
+            # Other writers (e.g. enrich_contacts.py) update contacts through
+            # their own connections; drop the mirror so it refills from SQLite
+            if cache is not None:
+                data_version = self._current_data_version()
+                if data_version != self._data_version:
+                    self._data_version = data_version
+                    self._contact_by_id.clear()
+                    self._contact_by_email.clear()
+            
+            contact = cache.get(key) if cache is not None else None
+            if contact is None:
+                result = self.conn.execute(sql, (key,)).fetchone()
+                if result is None:
+                    return None
+                contact = dict(result)
+                self._cache_contact(contact)
+        
+        return dict(contact)
     
     def add_contact(self, contact_data: Dict[str, Any]) -> int:
-        """Add contact to database"""
-        conn = sqlite3.connect(self.db_path)
-        cursor = conn.cursor()
-        
-        try:
-            cursor.execute("""
-                INSERT INTO contacts 
-                (firstname, lastname, email, phone, company, jobtitle, mbti, disc, score, 
-                 hubspot_id, lifecycle_stage, source)
-                VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-            """, (
-                contact_data.get('firstname'),
-                contact_data.get('lastname'),
-                contact_data.get('email'),
-                contact_data.get('phone'),
-                contact_data.get('company'),
-                contact_data.get('jobtitle'),
-                contact_data.get('mbti'),
-                contact_data.get('disc'),
-                contact_data.get('score', 0),
-                contact_data.get('hubspot_id'),
-                contact_data.get('lifecycle_stage'),
-                contact_data.get('source', 'manual')
-            ))
+        """Add contact to database; returns None if the email already exists"""
+        row = self._contact_row(contact_data)
+        with self._lock, self.conn:
+            cursor = self.conn.execute(SQL_INSERT_CONTACT, row)
+            if not cursor.rowcount:
+                return None
             
-            conn.commit()
-            contact_id = cursor.lastrowid
-            conn.close()
-            return contact_id
-        except sqlite3.IntegrityError:
-            # Email already exists
-            conn.close()
-            return None
+            firstname, lastname, email, _, company, jobtitle = row[:6]
+            self._cache_contact({
+                'id': cursor.lastrowid,
+                'firstname': firstname,
+                'lastname': lastname,
+                'email': email,
+                'company': company,
+                'jobtitle': jobtitle,
+                'enriched_profile': None
+            })
+        
+        return cursor.lastrowid
+    
+    def add_contacts_bulk(self, contacts: List[Dict[str, Any]]) -> int:
+        """Add many contacts in one transaction; returns how many were new"""
+        with self._lock, self.conn:
+            cursor = self.conn.executemany(SQL_INSERT_CONTACT, map(self._contact_row, contacts))
+        
+        return cursor.rowcount
     
     def get_contact_by_email(self, email: str) -> Optional[Dict]:
         """Get contact by email address"""
-        conn = sqlite3.connect(self.db_path)
-        cursor = conn.cursor()
-        
-        cursor.execute("""
-            SELECT id, firstname, lastname, email, company, jobtitle
-            FROM contacts
-            WHERE email = ?
-        """, (email,))
-        
-        result = cursor.fetchone()
-        conn.close()
-        
-        if result:
-            return {
-                'id': result[0],
-                'firstname': result[1],
-                'lastname': result[2],
-                'email': result[3],
-                'company': result[4],
-                'jobtitle': result[5]
-            }
-        return None
+        contact = self._lookup_contact(self._contact_by_email, SQL_CONTACT_BY_EMAIL, email)
+        if contact:
+            del contact['enriched_profile']
+        return contact
     
     def get_contact_by_id(self, contact_id: int) -> Optional[Dict]:
         """Get contact by ID"""
-        conn = sqlite3.connect(self.db_path)
-        cursor = conn.cursor()
-        
-        cursor.execute("""
-            SELECT id, firstname, lastname, email, company, jobtitle, enriched_profile
-            FROM contacts
-            WHERE id = ?
-        """, (contact_id,))
-        
-        result = cursor.fetchone()
-        conn.close()
-        
-        if result:
-            return {
-                'id': result[0],
-                'firstname': result[1],
-                'lastname': result[2],
-                'email': result[3],
-                'company': result[4],
-                'jobtitle': result[5],
-                'enriched_profile': result[6]
-            }
-        return None
+        return self._lookup_contact(self._contact_by_id, SQL_CONTACT_BY_ID, contact_id)
     
     def save_generated_content(self, contact_id: int, content_type: str, content_data: Dict[str, Any]) -> int:
         """Save generated email or call content"""
-        conn = sqlite3.connect(self.db_path)
-        cursor = conn.cursor()
-        
-        cursor.execute("""
-            INSERT INTO generated_content
-            (contact_id, content_type, variant_num, style, subject, body, lines, cta, objections, status)
-            VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-        """, (
-            contact_id,
-            content_type,
-            content_data.get('variant_num'),
-            content_data.get('style'),
-            content_data.get('subject'),
-            content_data.get('body'),
-            json.dumps(content_data.get('lines', [])),
-            content_data.get('cta'),
-            json.dumps(content_data.get('objections', {}))
-        ))
+        with self._lock, self.conn:
+            cursor = self.conn.execute("""
+                INSERT INTO generated_content
+                (contact_id, content_type, variant_num, style, subject, body, lines, cta, objections, status)
+                VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+            """, (
+                contact_id,
+                content_type,
+                content_data.get('variant_num'),
+                content_data.get('style'),
+                content_data.get('subject'),
+                content_data.get('body'),
+                _json_or_none(content_data.get('lines')),
+                content_data.get('cta'),
+                _json_or_none(content_data.get('objections')),
+                content_data.get('status', 'pending')
+            ))
         
-        conn.commit()
-        content_id = cursor.lastrowid
-        conn.close()
-        return content_id
+        return cursor.lastrowid
     
     def record_user_feedback(self, content_id: int, contact_id: int, action: str, reasoning: str = "", variant_num: int = None, style: str = None):
         """Record user's accept/reject decision"""
-        conn = sqlite3.connect(self.db_path)
-        cursor = conn.cursor()
-        
-        # Update content status
-        column_name = "accepted_at" if action.lower() == "accepted" else "rejected_at"
-        cursor.execute(f"""
-            UPDATE generated_content
-            SET status = ?, {column_name} = CURRENT_TIMESTAMP
-            WHERE id = ?
-        """, (action.lower(), content_id))
-        
-        # Record in ML training data
-        cursor.execute("""
-            INSERT INTO ml_feedback (content_id, contact_id, user_action, reasoning, variant_num, style)
-            VALUES (?, ?, ?, ?, ?, ?)
-        """, (content_id, contact_id, action, reasoning, variant_num, style))
-        
-        conn.commit()
-        conn.close()
+        self.record_user_feedback_bulk([(content_id, contact_id, action, reasoning, variant_num, style)])
+    
+    def record_user_feedback_bulk(self, items: List[tuple]):
+        """Record many accept/reject decisions in a single transaction
+        
+        Each item is (content_id, contact_id, action, reasoning, variant_num, style).
+        """
+        accepted, rejected, feedback = [], [], []
+        for content_id, contact_id, action, reasoning, variant_num, style in items:
+            status = action.lower()
+            (accepted if status == "accepted" else rejected).append((status, content_id))
+            feedback.append((content_id, contact_id, action, reasoning, variant_num, style))
+        
+        with self._lock, self.conn:
+            self._feedback_version += 1
+            
+            # Update content status
+            if accepted:
+                self.conn.executemany(SQL_UPDATE_ACCEPTED, accepted)
+            if rejected:
+                self.conn.executemany(SQL_UPDATE_REJECTED, rejected)
+            
+            # Record in ML training data
+            self.conn.executemany(SQL_INSERT_FEEDBACK, feedback)
     
     def get_content_quality_score(self, style: str) -> float:
         """Calculate quality score for a style based on user feedback"""
-        conn = sqlite3.connect(self.db_path)
-        cursor = conn.cursor()
-        
-        cursor.execute("""
-            SELECT COUNT(*) as total,
-                   SUM(CASE WHEN user_action = 'accepted' THEN 1 ELSE 0 END) as accepted
-            FROM ml_feedback
-            WHERE style = ?
-        """, (style,))
-        
-        result = cursor.fetchone()
-        conn.close()
+        with self._lock:
+            result = self.conn.execute(SQL_QUALITY, (style,)).fetchone()
         
         if result[0] == 0:
             return 0.5  # Neutral for untested styles
@@ -257,108 +395,106 @@ class SalesAngelDB:
     
     def get_ml_features(self) -> Dict[str, Any]:
         """Get aggregate ML features from user feedback"""
-        conn = sqlite3.connect(self.db_path)
-        cursor = conn.cursor()
-        
-        # Overall acceptance rate
-        cursor.execute("""
-            SELECT COUNT(*) as total,
-                   SUM(CASE WHEN user_action = 'accepted' THEN 1 ELSE 0 END) as accepted
-            FROM ml_feedback
-        """)
-        
-        total, accepted = cursor.fetchone()
-        
-        # Acceptance by style
-        cursor.execute("""
-            SELECT style,
-                   COUNT(*) as count,
-                   SUM(CASE WHEN user_action = 'accepted' THEN 1 ELSE 0 END) as accepted
-            FROM ml_feedback
-            GROUP BY style
-        """)
-        
-        style_stats = cursor.fetchall()
-        
-        # Acceptance by variant number
-        cursor.execute("""
-            SELECT variant_num,
-                   COUNT(*) as count,
-                   SUM(CASE WHEN user_action = 'accepted' THEN 1 ELSE 0 END) as accepted
-            FROM ml_feedback
-            GROUP BY variant_num
-        """)
-        
-        variant_stats = cursor.fetchall()
-        conn.close()
-        
-        return {
-            'total_feedback': total or 0,
-            'total_accepted': accepted or 0,
+        # One scan over ml_feedback, rolled up per style and per variant below
+        # Keyed on data_version too, so feedback committed by other
+        # connections (other instances or processes) invalidates the cache
+        with self._lock:
+            version = (self._feedback_version, self._current_data_version())
+            cached_version, features = self._ml_features_cache
+            if cached_version == version:
+                return features
+            rows = self.conn.execute("""
+                SELECT style, variant_num,
+                       COUNT(*) as count,
+                       SUM(CASE WHEN user_action = 'accepted' THEN 1 ELSE 0 END) as accepted
+                FROM ml_feedback
+                GROUP BY style, variant_num
+            """).fetchall()
+        
+        total = accepted = 0
+        by_style = {}
+        by_variant = {}
+        for style, var, count, acc in rows:
+            total += count
+            accepted += acc
+            for stats in (by_style.setdefault(style, {'count': 0, 'accepted': 0}),
+                          by_variant.setdefault(var, {'count': 0, 'accepted': 0})):
+                stats['count'] += count
+                stats['accepted'] += acc
+        
+        features = {
+            'total_feedback': total,
+            'total_accepted': accepted,
             'acceptance_rate': (accepted / total if total else 0),
-            'by_style': {style: {'count': count, 'accepted': acc} for style, count, acc in style_stats},
-            'by_variant': {var: {'count': count, 'accepted': acc} for var, count, acc in variant_stats}
+            'by_style': by_style,
+            'by_variant': {var: by_variant[var] for var in sorted(by_variant, key=lambda v: (v is not None, v))}
         }
+        
+        with self._lock:
+            if (self._feedback_version, self._current_data_version()) == version:
+                self._ml_features_cache = (version, features)
+        return features
+    
+    def get_feature_weights(self) -> Dict[str, Dict]:
+        """Get acceptance rate per style and per variant, ready to use as model weights"""
+        with self._lock:
+            rows = self.conn.execute("""
+                SELECT 'style', style, acceptance_rate FROM ml_style_scores
+                UNION ALL
+                SELECT 'variant_num', variant_num, acceptance_rate FROM ml_variant_scores
+            """).fetchall()
+        
+        weights = {'style': {}, 'variant_num': {}}
+        for kind, value, rate in rows:
+            weights[kind][value] = rate
+        return weights
     
     def get_pending_content(self, contact_id: int = None) -> List[Dict]:
         """Get pending content for review"""
-        conn = sqlite3.connect(self.db_path)
-        conn.row_factory = sqlite3.Row
-        cursor = conn.cursor()
-        
-        if contact_id:
-            cursor.execute("""
-                SELECT * FROM generated_content
-                WHERE status = 'pending' AND contact_id = ?
-                ORDER BY generated_at DESC
-            """, (contact_id,))
-        else:
-            cursor.execute("""
-                SELECT * FROM generated_content
-                WHERE status = 'pending'
-                ORDER BY generated_at DESC
-            """)
-        
-        results = cursor.fetchall()
-        conn.close()
+        with self._lock:
+            cursor = self.conn.cursor()
+            
+            if contact_id:
+                cursor.execute("""
+                    SELECT * FROM generated_content
+                    WHERE status = 'pending' AND contact_id = ?
+                    ORDER BY generated_at DESC
+                """, (contact_id,))
+            else:
+                cursor.execute("""
+                    SELECT * FROM generated_content
+                    WHERE status = 'pending'
+                    ORDER BY generated_at DESC
+                """)
+            
+            results = cursor.fetchall()
         
         return [dict(row) for row in results]
     
     def get_all_contacts(self, limit: int = None) -> List[Dict]:
         """Get all contacts"""
-        conn = sqlite3.connect(self.db_path)
-        cursor = conn.cursor()
-        
-        if limit:
-            cursor.execute("""
-                SELECT id, firstname, lastname, email, company, jobtitle
-                FROM contacts
-                ORDER BY created_at DESC
-                LIMIT ?
-            """, (limit,))
-        else:
-            cursor.execute("""
-                SELECT id, firstname, lastname, email, company, jobtitle
-                FROM contacts
-                ORDER BY created_at DESC
-            """)
-        
-        results = cursor.fetchall()
-        conn.close()
+        with self._lock:
+            cursor = self.conn.cursor()
+            
+            if limit:
+                cursor.execute("""
+                    SELECT id, firstname, lastname, email, company, jobtitle
+                    FROM contacts
+                    ORDER BY created_at DESC
+                    LIMIT ?
+                """, (limit,))
+            else:
+                cursor.execute("""
+                    SELECT id, firstname, lastname, email, company, jobtitle
+                    FROM contacts
+                    ORDER BY created_at DESC
+                """)
+            
+            results = cursor.fetchall()
         
-        return [
-            {
-                'id': r[0],
-                'firstname': r[1],
-                'lastname': r[2],
-                'email': r[3],
-                'company': r[4],
-                'jobtitle': r[5]
-            }
-            for r in results
-        ]
-
+        return [dict(row) for row in results]
 
 if __name__ == "__main__":
     db = SalesAngelDB()
     print("✅ Database initialized: sales_angel.db")
+    db.close()
@@ -6,10 +6,23 @@ Tracks quality metrics and improves over time
 """
 
 import json
-from typing import Dict, List, Any
+import re
+from operator import itemgetter
+from typing import Dict, List, Any, Optional, Tuple
 from collections import defaultdict
 from sales_angel_db import SalesAngelDB
 
+try:
+    import numpy as np
+except ImportError:  # optional; score_batch falls back to score_content
+    np = None
+
+# Body scans compiled once; IGNORECASE avoids lowering each body first
+_RE_SPECIFIC = re.compile(r'bank|lending|credit|deal', re.IGNORECASE)
+_RE_LENDING_CONTEXT = re.compile(r'specific|bank|lending|credit', re.IGNORECASE)
+_RE_GENERIC = re.compile(r'hope you are well|reach out|let me know|interested in', re.IGNORECASE)
+_RE_BANNED = re.compile(r'\b(?:fintech|software|platform|app|AI solution)s?\b', re.IGNORECASE)
+
 class ContentQualityPredictor:
     """ML model that learns from user feedback"""
 
@@ -28,24 +41,21 @@ class ContentQualityPredictor:
         Train model from user feedback
         Updates weights based on what users accept/reject
         """
-        ml_features = self.db.get_ml_features()
-
-        # Update style weights
-        for style, stats in ml_features.get('by_style', {}).items():
-            count = stats['count']
-            accepted = stats['accepted']
-            acceptance_rate = accepted / count if count > 0 else 0.5
-            self.feature_weights['style'][style] = acceptance_rate
+        # Acceptance rates come pre-aggregated from the ml_*_scores views
+        weights = self.db.get_feature_weights()
 
-        # Update variant weights
-        for variant, stats in ml_features.get('by_variant', {}).items():
-            count = stats['count']
-            accepted = stats['accepted']
-            acceptance_rate = accepted / count if count > 0 else 0.5
-            self.feature_weights['variant_num'][variant] = acceptance_rate
+        # Update style and variant weights
+        self.feature_weights['style'].update(weights['style'])
+        self.feature_weights['variant_num'].update(weights['variant_num'])
 
         return self.feature_weights
 
+    @staticmethod
+    def _prepare_body(content: Dict[str, Any]) -> Tuple[str, int]:
+        """Body text and word count, computed once per content"""
+        body = content.get('body', '')
+        return body, len(body.split())
+
     def score_content(self, content: Dict[str, Any]) -> float:
         """
         Predict quality score (0-1) based on learned patterns
@@ -64,7 +74,7 @@ class ContentQualityPredictor:
             score += self.feature_weights['variant_num'][variant] * 0.3
 
         # Length component (shorter often better for calls, emails moderate)
-        word_count = len(content.get('body', '').split())
+        body, word_count = self._prepare_body(content)
         if word_count > 0:
             # Prefer 60-100 words; penalty outside
             if 60 <= word_count <= 100:
@@ -73,30 +83,57 @@ class ContentQualityPredictor:
                 score += 0.05
 
         # Has specific reference
-        body = content.get('body', '').lower()
-        if any(word in body for word in ['bank', 'lending', 'credit', 'deal']):
+        if _RE_SPECIFIC.search(body):
             score += 0.1
 
         return min(score, 1.0)
 
+    def score_batch(self, contents: List[Dict[str, Any]]) -> List[float]:
+        """
+        Score many contents at once; same result as score_content per item
+        Uses NumPy when installed so the weighting runs as array operations
+        """
+        if np is None or not contents:
+            return [self.score_content(content) for content in contents]
+
+        style_weights = self.feature_weights['style']
+        variant_weights = self.feature_weights['variant_num']
+        bodies, word_counts = zip(*map(self._prepare_body, contents))
+
+        style_weight = np.array([style_weights.get(c.get('style', 'Unknown'), 0.0) for c in contents])
+        variant_weight = np.array([variant_weights.get(c.get('variant_num', 0), 0.0) for c in contents])
+        wc = np.array(word_counts, dtype=np.int64)
+        specific = np.fromiter((_RE_SPECIFIC.search(body) is not None for body in bodies), dtype=bool, count=len(bodies))
+
+        preferred = (wc >= 60) & (wc <= 100)
+        acceptable = (wc >= 50) & (wc <= 150) & ~preferred
+
+        score = 0.5 + style_weight * 0.4
+        score += variant_weight * 0.3
+        score += np.where(preferred, 0.15, np.where(acceptable, 0.05, 0.0))
+        score += np.where(specific, 0.1, 0.0)
+        return np.minimum(score, 1.0).tolist()
+
     def get_recommendations(self, contact: Dict[str, Any]) -> Dict[str, str]:
         """
         Get explanations for why each option is good or bad
         """
         ml_features = self.db.get_ml_features()
         acceptance_rate = ml_features.get('acceptance_rate', 0.5)
+        prepared = self._prepare_body(contact)
 
         recommendations = {
-            'accept': self._build_accept_reasoning(contact, ml_features),
-            'reject': self._build_reject_reasoning(contact, ml_features),
+            'accept': self._build_accept_reasoning(contact, ml_features, prepared),
+            'reject': self._build_reject_reasoning(contact, ml_features, prepared),
             'overall_quality': self._quality_summary(ml_features)
         }
 
         return recommendations
 
-    def _build_accept_reasoning(self, content: Dict[str, Any], ml_features: Dict) -> str:
+    def _build_accept_reasoning(self, content: Dict[str, Any], ml_features: Dict, prepared: Optional[Tuple[str, int]] = None) -> str:
         """Build explanation for accepting content"""
         reasons = []
+        body, word_count = prepared or self._prepare_body(content)
 
         style = content.get('style', 'Unknown')
         if style in ml_features.get('by_style', {}):
@@ -107,11 +144,10 @@ class ContentQualityPredictor:
                 reasons.append(f"✅ {style} style: {pct:.0f}% user acceptance rate")
 
         # Check for specificity
-        body = content.get('body', '').lower()
-        if any(term in body for term in ['specific', 'bank', 'lending', 'credit']):
+        if _RE_LENDING_CONTEXT.search(body):
             reasons.append("✅ References specific lending context")
 
-        if len(content.get('body', '').split()) < 100:
+        if word_count < 100:
             reasons.append("✅ Concise (under 100 words - improves response rates)")
 
         if content.get('cta'):
@@ -122,9 +158,10 @@ class ContentQualityPredictor:
 
         return " | ".join(reasons)
 
-    def _build_reject_reasoning(self, content: Dict[str, Any], ml_features: Dict) -> str:
+    def _build_reject_reasoning(self, content: Dict[str, Any], ml_features: Dict, prepared: Optional[Tuple[str, int]] = None) -> str:
         """Build explanation for rejecting content"""
         reasons = []
+        body, word_count = prepared or self._prepare_body(content)
 
         style = content.get('style', 'Unknown')
         if style in ml_features.get('by_style', {}):
@@ -136,13 +173,10 @@ class ContentQualityPredictor:
                     reasons.append(f"⚠️  {style} style: only {pct:.0f}% acceptance rate (below average)")
 
         # Check for generic language
-        body = content.get('body', '').lower()
-        generic_terms = ['hope you are well', 'reach out', 'let me know', 'interested in']
-        if any(term in body for term in generic_terms):
+        if _RE_GENERIC.search(body):
             reasons.append("⚠️  Contains generic opening (reduces response rates)")
 
         # Check length
-        word_count = len(content.get('body', '').split())
         if word_count > 150:
             reasons.append(f"⚠️  Too long ({word_count} words - aim for 60-100)")
 
@@ -150,8 +184,7 @@ class ContentQualityPredictor:
             reasons.append("⚠️  No clear call-to-action")
 
         # Check for banned terms
-        banned = ['fintech', 'software', 'platform', 'app', 'AI solution']
-        if any(term.lower() in body for term in banned):
+        if _RE_BANNED.search(body):
             reasons.append("🚫 Contains off-topic terms (fintech/software/etc.)")
 
         if not reasons:
@@ -190,19 +223,11 @@ class AdaptivePromptOptimizer:
 
         # Find best styles
         by_style = ml_features.get('by_style', {})
-        ranked_styles = sorted(
-            by_style.items(),
-            key=lambda x: (x[1]['accepted'] / x[1]['count'] if x[1]['count'] > 0 else 0),
-            reverse=True
-        )
+        ranked_styles = self._rank_by_acceptance(by_style)
 
         # Find best variants
         by_variant = ml_features.get('by_variant', {})
-        ranked_variants = sorted(
-            by_variant.items(),
-            key=lambda x: (x[1]['accepted'] / x[1]['count'] if x[1]['count'] > 0 else 0),
-            reverse=True
-        )
+        ranked_variants = self._rank_by_acceptance(by_variant)
 
         preferences = {
             'preferred_styles': [style for style, _ in ranked_styles[:2]],
@@ -214,6 +239,16 @@ class AdaptivePromptOptimizer:
         self.user_preferences = preferences
         return preferences
 
+    @staticmethod
+    def _rank_by_acceptance(stats_by_key: Dict[Any, Dict]) -> List[tuple]:
+        """(key, acceptance_rate) pairs, best first; rates computed once"""
+        rates = [
+            (key, stats['accepted'] / stats['count'] if stats['count'] > 0 else 0)
+            for key, stats in stats_by_key.items()
+        ]
+        rates.sort(key=itemgetter(1), reverse=True)
+        return rates
+
     def get_optimized_prompt_adjustments(self) -> str:
         """
         Returns prompt adjustments based on learned preferences
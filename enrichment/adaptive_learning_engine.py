@@ -3,20 +3,68 @@
 # adaptive_learning_engine.py - AI that learns from your results
 
 import sqlite3
+import time
 from datetime import datetime, timezone
 from collections import defaultdict
 import json
 
+# (sent, opened, replied, meeting) increments for each recorded outcome
+OUTCOME_DELTAS = {
+		'sent': (1, 0, 0, 0),
+		'delivered': (1, 0, 0, 0),
+		'opened': (0, 1, 0, 0),
+		'viewed': (0, 1, 0, 0),
+		'replied': (0, 0, 1, 0),
+		'response': (0, 0, 1, 0),
+		'meeting': (0, 0, 0, 1),
+		'booked': (0, 0, 0, 1),
+}
+
+# Tiers that get their own best-variant insight
+INSIGHT_TIERS = ('HOT', 'WARM', 'QUALIFIED')
+
+# SQL form of _get_score_range(), so record_outcome buckets in the same statement
+SCORE_RANGE_SQL = """CASE WHEN score >= 80 THEN '80-100'
+								WHEN score >= 60 THEN '60-79'
+								WHEN score >= 40 THEN '40-59'
+								ELSE '0-39' END"""
+
+# record_outcome() re-runs _analyze_patterns() after this many events, or on
+# the first event once this many seconds have passed since the last run
+ANALYZE_EVERY_EVENTS = 25
+ANALYZE_MAX_INTERVAL = 60
+
 class AdaptiveLearningEngine:
 		"""Learn which content variants perform best and auto-optimize"""
 	
 		def __init__(self, db_path='sales_angel.db'):
 				self.db_path = db_path
+				# One connection for the engine's lifetime instead of one per call
+				self.conn = self._connect()
 				self._init_tables()
+				self._events_since_analyze = 0
+				self._last_analyze = 0.0
+			
+		def close(self):
+				if self._events_since_analyze:
+						self.force_analyze()
+				self.conn.close()
+			
+		def _connect(self):
+				"""Open the shared connection with WAL and cache pragmas applied"""
+				conn = sqlite3.connect(self.db_path)
+				conn.row_factory = sqlite3.Row
+				# Lets the UPSERT in record_outcome() score rows with the Python formula
+				conn.create_function("performance_score", 4, self._calculate_performance_score, deterministic=True)
+				conn.execute("PRAGMA journal_mode=WAL")
+				conn.execute("PRAGMA synchronous=NORMAL")
+				conn.execute("PRAGMA temp_store=MEMORY")
+				conn.execute("PRAGMA cache_size=-20000")  # 20 MB page cache
+				return conn
 			
 		def _init_tables(self):
 				"""Create learning tables"""
-				conn = sqlite3.connect(self.db_path)
+				conn = self.conn
 			
 				# Variant performance tracking
 				conn.execute("""
@@ -49,96 +97,78 @@ class AdaptiveLearningEngine:
 						)
 				""")
 			
+				# Indexes for the segment lookups, insight listing and the
+				# active-insight-by-text check in _analyze_patterns()
+				conn.execute("""
+						CREATE INDEX IF NOT EXISTS idx_vp_lookup
+						ON variant_performance(variant_type, contact_tier, contact_score_range,
+												performance_score DESC, sent_count)
+				""")
+				conn.execute("""
+						CREATE INDEX IF NOT EXISTS idx_vp_type_sent
+						ON variant_performance(variant_type, sent_count)
+				""")
+				conn.execute("""
+						CREATE INDEX IF NOT EXISTS idx_li_active_conf
+						ON learning_insights(status, confidence DESC, created_at DESC)
+				""")
+				conn.execute("""
+						CREATE INDEX IF NOT EXISTS idx_li_text
+						ON learning_insights(insight_text) WHERE status = 'active'
+				""")
+			
 				conn.commit()
-				conn.close()
 			
 		def record_outcome(self, contact_id, variant_type, variant_num, outcome):
 				"""Record outcome for a specific variant use"""
 			
-				conn = sqlite3.connect(self.db_path)
-				conn.row_factory = sqlite3.Row
-			
-				# Get contact details
-				contact = conn.execute("""
-						SELECT tier, score FROM contacts WHERE id = ?
-				""", (contact_id,)).fetchone()
-			
-				if not contact:
-						conn.close()
+				conn = self.conn
+			
+				# Add this outcome's counts to the contact's segment row, creating
+				# it if needed; tier and score range are read from contacts inline
+				deltas = OUTCOME_DELTAS.get(outcome, (0, 0, 0, 0))
+				cursor = conn.execute(f"""
+						INSERT INTO variant_performance 
+						(variant_type, variant_number, contact_tier, contact_score_range,
+							sent_count, opened_count, replied_count, meeting_count,
+							performance_score, last_updated)
+						SELECT ?, ?, tier, {SCORE_RANGE_SQL}, ?, ?, ?, ?, ?, ?
+						FROM contacts WHERE id = ?
+						ON CONFLICT(variant_type, variant_number, contact_tier, contact_score_range)
+						DO UPDATE SET
+								sent_count = sent_count + excluded.sent_count,
+								opened_count = opened_count + excluded.opened_count,
+								replied_count = replied_count + excluded.replied_count,
+								meeting_count = meeting_count + excluded.meeting_count,
+								performance_score = performance_score(
+										sent_count + excluded.sent_count,
+										opened_count + excluded.opened_count,
+										replied_count + excluded.replied_count,
+										meeting_count + excluded.meeting_count),
+								last_updated = excluded.last_updated
+				""", (variant_type, variant_num, *deltas,
+							self._calculate_performance_score(*deltas),
+							datetime.now(timezone.utc).isoformat(), contact_id))
+			
+				# Unknown contact: nothing was written, but the statement opened a
+				# write transaction; end it so the shared connection drops its lock
+				if cursor.rowcount == 0:
+						conn.rollback()
 						return
 			
-				tier = contact['tier']
-				score = contact['score']
-				score_range = self._get_score_range(score)
-			
-				# Get or create performance record
-				perf = conn.execute("""
-						SELECT * FROM variant_performance 
-						WHERE variant_type = ? AND variant_number = ? 
-							AND contact_tier = ? AND contact_score_range = ?
-				""", (variant_type, variant_num, tier, score_range)).fetchone()
-			
-				if perf:
-						# Update existing
-						updates = {
-								'sent_count': perf['sent_count'],
-								'opened_count': perf['opened_count'],
-								'replied_count': perf['replied_count'],
-								'meeting_count': perf['meeting_count']
-						}
-					
-						if outcome in ['sent', 'delivered']:
-								updates['sent_count'] += 1
-						elif outcome in ['opened', 'viewed']:
-								updates['opened_count'] += 1
-						elif outcome in ['replied', 'response']:
-								updates['replied_count'] += 1
-						elif outcome in ['meeting', 'booked']:
-								updates['meeting_count'] += 1
-							
-						# Calculate performance score
-						score = self._calculate_performance_score(
-								updates['sent_count'],
-								updates['opened_count'],
-								updates['replied_count'],
-								updates['meeting_count']
-						)
-					
-						conn.execute("""
-								UPDATE variant_performance 
-								SET sent_count = ?, opened_count = ?, replied_count = ?, 
-										meeting_count = ?, performance_score = ?, last_updated = ?
-								WHERE id = ?
-						""", (updates['sent_count'], updates['opened_count'], 
-									updates['replied_count'], updates['meeting_count'],
-									score, datetime.now(timezone.utc).isoformat(), perf['id']))
-				else:
-						# Create new
-						initial_counts = {
-								'sent': 1 if outcome in ['sent', 'delivered'] else 0,
-								'opened': 1 if outcome in ['opened', 'viewed'] else 0,
-								'replied': 1 if outcome in ['replied', 'response'] else 0,
-								'meeting': 1 if outcome in ['meeting', 'booked'] else 0
-						}
-					
-						score = self._calculate_performance_score(**initial_counts)
-					
-						conn.execute("""
-								INSERT INTO variant_performance 
-								(variant_type, variant_number, contact_tier, contact_score_range,
-									sent_count, opened_count, replied_count, meeting_count,
-									performance_score, last_updated)
-								VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-						""", (variant_type, variant_num, tier, score_range,
-									initial_counts['sent'], initial_counts['opened'],
-									initial_counts['replied'], initial_counts['meeting'],
-									score, datetime.now(timezone.utc).isoformat()))
-					
 				conn.commit()
-				conn.close()
 			
-				# Check for new insights
+				# Check for new insights, debounced so bulk ingestion stays linear
+				self._events_since_analyze += 1
+				if (self._events_since_analyze >= ANALYZE_EVERY_EVENTS
+								or time.time() - self._last_analyze > ANALYZE_MAX_INTERVAL):
+						self.force_analyze()
+			
+		def force_analyze(self):
+				"""Refresh insights now, regardless of the debounce"""
 				self._analyze_patterns()
+				self._events_since_analyze = 0
+				self._last_analyze = time.time()
 			
 		def _get_score_range(self, score):
 				"""Bucket scores into ranges"""
@@ -168,8 +198,7 @@ class AdaptiveLearningEngine:
 		def get_best_variant(self, variant_type, tier, score):
 				"""Get recommended variant based on learning"""
 			
-				conn = sqlite3.connect(self.db_path)
-				conn.row_factory = sqlite3.Row
+				conn = self.conn
 			
 				score_range = self._get_score_range(score)
 			
@@ -186,8 +215,6 @@ class AdaptiveLearningEngine:
 						LIMIT 1
 				""", (variant_type, tier, score_range)).fetchone()
 			
-				conn.close()
-			
 				if variants:
 						return {
 								'recommended_variant': variants['variant_number'],
@@ -207,75 +234,75 @@ class AdaptiveLearningEngine:
 		def _analyze_patterns(self):
 				"""Analyze patterns and generate insights"""
 			
-				conn = sqlite3.connect(self.db_path)
-				conn.row_factory = sqlite3.Row
-			
-				# Find patterns
-				insights = []
-			
-				# Pattern 1: Best performing variant overall
-				best_email = conn.execute("""
-						SELECT variant_number, AVG(performance_score) as avg_score,
-										SUM(sent_count) as total_sent
-						FROM variant_performance
-						WHERE variant_type = 'email' AND sent_count >= 5
-						GROUP BY variant_number
-						ORDER BY avg_score DESC
-						LIMIT 1
-				""").fetchone()
+				conn = self.conn
 			
-				if best_email and best_email['avg_score'] > 0:
-						insights.append({
-								'type': 'best_variant',
-								'text': f"Email variant {best_email['variant_number']} performs best overall (score: {best_email['avg_score']:.1f}, {best_email['total_sent']} sends)",
-								'confidence': 0.8 if best_email['total_sent'] >= 20 else 0.6,
-								'evidence': best_email['total_sent']
-						})
-					
-				# Pattern 2: Tier-specific insights
-				for tier in ['HOT', 'WARM', 'QUALIFIED']:
-						best_for_tier = conn.execute("""
-								SELECT variant_number, performance_score, sent_count
+				# Find patterns: the best email variant overall, then the best
+				# variant for each tier, gathered in one query
+				rows = conn.execute("""
+						SELECT 'best_variant' as kind, NULL as tier, variant_number,
+										avg_score as score, total_sent as sent
+						FROM (
+								SELECT variant_number, AVG(performance_score) as avg_score,
+												SUM(sent_count) as total_sent
+								FROM variant_performance
+								WHERE variant_type = 'email' AND sent_count >= 5
+								GROUP BY variant_number
+								ORDER BY avg_score DESC
+								LIMIT 1
+						)
+				""" + "".join("""
+						UNION ALL
+						SELECT * FROM (
+								SELECT 'tier_specific', contact_tier, variant_number,
+												performance_score, sent_count
 								FROM variant_performance
 								WHERE variant_type = 'email' 
 									AND contact_tier = ?
 									AND sent_count >= 3
 								ORDER BY performance_score DESC
 								LIMIT 1
-						""", (tier,)).fetchone()
-					
-						if best_for_tier:
+						)
+				""" for _ in INSIGHT_TIERS), INSIGHT_TIERS).fetchall()
+			
+				insights = []
+				for row in rows:
+						if row['kind'] == 'best_variant':
+								# Pattern 1: Best performing variant overall
+								if row['score'] > 0:
+										insights.append({
+												'type': 'best_variant',
+												'text': f"Email variant {row['variant_number']} performs best overall (score: {row['score']:.1f}, {row['sent']} sends)",
+												'confidence': 0.8 if row['sent'] >= 20 else 0.6,
+												'evidence': row['sent']
+										})
+						else:
+								# Pattern 2: Tier-specific insights
 								insights.append({
 										'type': 'tier_specific',
-										'text': f"{tier} contacts respond best to variant {best_for_tier['variant_number']} (score: {best_for_tier['performance_score']:.1f})",
-										'confidence': 0.7 if best_for_tier['sent_count'] >= 10 else 0.5,
-										'evidence': best_for_tier['sent_count']
+										'text': f"{row['tier']} contacts respond best to variant {row['variant_number']} (score: {row['score']:.1f})",
+										'confidence': 0.7 if row['sent'] >= 10 else 0.5,
+										'evidence': row['sent']
 								})
 							
-				# Save new insights
-				for insight in insights:
-						# Check if similar insight exists
-						existing = conn.execute("""
-								SELECT id FROM learning_insights
-								WHERE insight_text = ? AND status = 'active'
-						""", (insight['text'],)).fetchone()
-					
-						if not existing:
-								conn.execute("""
-										INSERT INTO learning_insights
-										(insight_type, insight_text, confidence, evidence_count, created_at)
-										VALUES (?, ?, ?, ?, ?)
-								""", (insight['type'], insight['text'], insight['confidence'],
-											insight['evidence'], datetime.now(timezone.utc).isoformat()))
+				# Save new insights unless the same text is already active
+				conn.executemany("""
+						INSERT INTO learning_insights
+						(insight_type, insight_text, confidence, evidence_count, created_at)
+						SELECT ?, ?, ?, ?, ?
+						WHERE NOT EXISTS (
+								SELECT 1 FROM learning_insights
+								WHERE insight_text = ?2 AND status = 'active'
+						)
+				""", [(insight['type'], insight['text'], insight['confidence'],
+							insight['evidence'], datetime.now(timezone.utc).isoformat())
+						for insight in insights])
 							
 				conn.commit()
-				conn.close()
 			
 		def get_insights(self, min_confidence=0.5):
 				"""Get current learning insights"""
 			
-				conn = sqlite3.connect(self.db_path)
-				conn.row_factory = sqlite3.Row
+				conn = self.conn
 			
 				insights = conn.execute("""
 						SELECT * FROM learning_insights
@@ -283,21 +310,17 @@ class AdaptiveLearningEngine:
 						ORDER BY confidence DESC, created_at DESC
 				""", (min_confidence,)).fetchall()
 			
-				conn.close()
 				return [dict(i) for i in insights]
 	
 		def generate_recommendations(self, contact_id):
 				"""Generate personalized recommendations for a contact"""
 			
-				conn = sqlite3.connect(self.db_path)
-				conn.row_factory = sqlite3.Row
+				conn = self.conn
 			
 				contact = conn.execute("""
 						SELECT tier, score FROM contacts WHERE id = ?
 				""", (contact_id,)).fetchone()
 			
-				conn.close()
-			
 				if not contact:
 						return None
 			
@@ -321,7 +344,7 @@ class AdaptiveLearningEngine:
 				print("="*80 + "\n")
 			
 				# Overall stats
-				conn = sqlite3.connect(self.db_path)
+				conn = self.conn
 			
 				total_data = conn.execute("""
 						SELECT COUNT(*) as segments, 
@@ -362,7 +385,6 @@ class AdaptiveLearningEngine:
 								print(f"  {confidence_icon} {insight['insight_text']}")
 								print(f"     Confidence: {insight['confidence']*100:.0f}% | Evidence: {insight['evidence_count']} samples")
 							
-				conn.close()
 				print("\n" + "="*80 + "\n")
 			
 			
@@ -395,6 +417,7 @@ Examples:
 		command = sys.argv[1]
 	
 		if command == 'summary':
+				engine.force_analyze()
 				engine.print_learning_summary()
 			
 		elif command == 'recommend':
@@ -426,4 +449,6 @@ Examples:
 			
 				engine.record_outcome(contact_id, variant_type, variant_num, outcome)
 				print(f"✅ Recorded: {variant_type} variant {variant_num} → {outcome}")
+				
+		engine.close()
 			
\ No newline at end of file
@@ -13,6 +13,16 @@ import sqlite3
 import json
 from datetime import datetime, timedelta
 
+# Per-contact acceptance rate from ml_feedback, shared by the scoring queries
+FEEDBACK_RATES_CTE = """
+    fb AS (
+        SELECT contact_id,
+               CAST(SUM(CASE WHEN user_action='accepted' THEN 1 ELSE 0 END) AS REAL) / COUNT(*) as rate
+        FROM ml_feedback
+        GROUP BY contact_id
+    )
+"""
+
 class AdvancedScoring:
 
     def __init__(self, db_path="sales_angel.db"):
@@ -39,17 +49,34 @@ class AdvancedScoring:
         contact = cursor.fetchone()
 
         if not contact:
+            conn.close()
             return 0
 
+        cursor.execute("""
+            SELECT COUNT(*) as total,
+                   SUM(CASE WHEN user_action='accepted' THEN 1 ELSE 0 END) as accepted
+            FROM ml_feedback
+            WHERE contact_id = ?
+        """, (contact_id,))
+
+        fb = cursor.fetchone()
+        conn.close()
+
+        acceptance_rate = fb['accepted'] / fb['total'] if fb['total'] else None
+        return self._score_contact(contact['score'], contact['enrichment_data'],
+                                   contact['enriched_at'], acceptance_rate)
+
+    def _score_contact(self, base_score, enrichment_data, enriched_at, acceptance_rate):
+        """Score (0-100) from a contact's stored fields and its feedback acceptance rate"""
         score = 0
 
         # 1. BASE SCORE (40 pts)
-        base = min(contact['score'] or 60, 100)
+        base = min(base_score or 60, 100)
         score += (base / 100) * 40
 
         # 2. ENRICHMENT (20 pts)
-        if contact['enrichment_data']:
-            enrich = json.loads(contact['enrichment_data'])
+        if enrichment_data:
+            enrich = json.loads(enrichment_data)
             enrich_score = 10  # Base 10 for being enriched
 
             if enrich.get('decision_maker'):
@@ -62,21 +89,12 @@ class AdvancedScoring:
             score += enrich_score
 
         # 3. ML FEEDBACK (25 pts)
-        cursor.execute("""
-            SELECT COUNT(*) as total,
-                   SUM(CASE WHEN user_action='accepted' THEN 1 ELSE 0 END) as accepted
-            FROM ml_feedback
-            WHERE contact_id = ?
-        """, (contact_id,))
-
-        fb = cursor.fetchone()
-        if fb['total'] and fb['total'] > 0:
-            acceptance_rate = (fb['accepted'] / fb['total'])
+        if acceptance_rate is not None:
             score += acceptance_rate * 25
 
         # 4. RECENCY (10 pts)
-        if contact['enriched_at']:
-            enriched_date = datetime.fromisoformat(contact['enriched_at'])
+        if enriched_at:
+            enriched_date = datetime.fromisoformat(enriched_at)
             days_old = (datetime.now() - enriched_date).days
 
             if days_old < 7:
@@ -84,37 +102,45 @@ class AdvancedScoring:
             elif days_old < 30:
                 score += 5
 
-        conn.close()
-
         return min(score, 100)
 
-    def batch_update_scores(self):
-        """Update all contact scores"""
+    def _connect(self):
+        """Connection with the scoring rules registered as advanced_score()"""
         conn = sqlite3.connect(self.db_path)
-        cursor = conn.cursor()
-        cursor.execute("SELECT id FROM contacts")
+        # JSON truthiness and local-time recency stay in Python, so the
+        # scoring rules are exposed to SQLite as a function
+        conn.create_function("advanced_score", 4, self._score_contact)
+        return conn
 
-        for row in cursor.fetchall():
-            contact_id = row[0]
-            new_score = self.calculate_score(contact_id)
+    def batch_update_scores(self):
+        """Update all contact scores"""
+        conn = self._connect()
 
-            cursor.execute("""
-                UPDATE contacts SET score = ? WHERE id = ?
-            """, (new_score, contact_id))
+        # One UPDATE over all contacts; feedback is aggregated once in the CTE
+        with conn:
+            conn.execute(f"""
+                WITH {FEEDBACK_RATES_CTE}
+                UPDATE contacts
+                SET score = advanced_score(score, enrichment_data, enriched_at,
+                                           (SELECT rate FROM fb WHERE fb.contact_id = contacts.id))
+            """)
 
-        conn.commit()
         conn.close()
 
     def get_top_contacts(self, limit=50):
         """Get top scored contacts"""
-        conn = sqlite3.connect(self.db_path)
+        conn = self._connect()
         cursor = conn.cursor()
 
-        # Calculate all scores inline
-        cursor.execute("""
-            SELECT id, firstname, lastname, company, score, enrichment_data
+        # Calculate all scores inline; SQLite keeps only the top rows while sorting
+        cursor.execute(f"""
+            WITH {FEEDBACK_RATES_CTE}
+            SELECT id, firstname, lastname, company,
+                   advanced_score(score, enrichment_data, enriched_at, fb.rate) AS live_score,
+                   enrichment_data
             FROM contacts
-            ORDER BY score DESC
+            LEFT JOIN fb ON fb.contact_id = contacts.id
+            ORDER BY live_score DESC
             LIMIT ?
         """, (limit,))
 
@@ -3,14 +3,35 @@
 # batch_enrichment_engine.py - Scale enrichment intelligently
 
 import sqlite3
+import contextlib
+import io
 import os
+import sys
 import time
+import threading
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timezone
 import requests
 from dotenv import load_dotenv
 
 load_dotenv()
 
+# Call scripts are generated in-process when the unified generator imports;
+# otherwise each contact falls back to the call_script_generator.py subprocess
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+try:
+		from api.services.content.call_script_generator_unified import UnifiedCallScriptGenerator
+except ImportError:
+		UnifiedCallScriptGenerator = None
+
+# Enrichment calls run in parallel; request starts are spaced at least
+# ENRICH_MIN_INTERVAL seconds apart to stay under the API rate limit
+ENRICH_CONCURRENCY = 5
+ENRICH_MIN_INTERVAL = 0.5
+
+# Enriched profiles are written in batches of up to this many rows
+ENRICH_FLUSH_SIZE = 25
+
 class BatchEnrichmentEngine:
 		"""Intelligent batch enrichment with cost control and prioritization"""
 	
@@ -20,16 +41,39 @@ class BatchEnrichmentEngine:
 				self.base_url = "https://api.perplexity.ai/chat/completions"
 				self.model = "sonar-pro"
 			
+				# Shared session keeps connections alive across enrichment calls
+				self.session = requests.Session()
+				self.session.headers["Authorization"] = f"Bearer {self.api_key}"
+				self._throttle_lock = threading.Lock()
+				self._next_request_at = 0.0
+			
+				# One connection for the engine's lifetime; profile updates queue
+				# in _pending and are written together by _flush_enrichments()
+				self.conn = self._connect()
+				self._pending = []
+			
 				# Cost tracking
 				self.cost_per_enrichment = 0.15  # $0.15 per contact
 				self.max_budget = 10.00  # Max $10 per batch
 			
-		def get_top_unenriched(self, limit=50):
-				"""Get highest-priority unenriched contacts"""
+				# Created once and reused for every auto-generated contact
+				self._call_gen = UnifiedCallScriptGenerator(db_path) if UnifiedCallScriptGenerator else None
+			
+		def close(self):
+				self._flush_enrichments()
+				self.conn.close()
+			
+		def _connect(self):
+				"""Open the shared connection with WAL pragmas applied"""
 				conn = sqlite3.connect(self.db_path)
 				conn.row_factory = sqlite3.Row
+				conn.execute("PRAGMA journal_mode=WAL")
+				conn.execute("PRAGMA synchronous=NORMAL")
+				return conn
 			
-				contacts = conn.execute("""
+		def get_top_unenriched(self, limit=50):
+				"""Get highest-priority unenriched contacts"""
+				contacts = self.conn.execute("""
 						SELECT id, firstname, lastname, company, jobtitle, email, phone,
 										score, tier, linkedin_url
 						FROM contacts 
@@ -40,11 +84,48 @@ class BatchEnrichmentEngine:
 						LIMIT ?
 				""", (limit,)).fetchall()
 			
-				conn.close()
 				return [dict(c) for c in contacts]
 	
 		def enrich_contact(self, contact):
 				"""Enrich a single contact using Perplexity"""
+				content, error = self._fetch_enrichment(contact)
+				if error:
+						print(error)
+						return False
+			
+				self._queue_enrichment(contact, content)
+				self._flush_enrichments()
+				return True
+			
+		def _queue_enrichment(self, contact, content):
+				"""Queue a contact's profile for the next batched write"""
+				self._pending.append((content, datetime.now(timezone.utc).isoformat(), self.model, contact['id']))
+			
+		def _flush_enrichments(self):
+				"""Write all queued profiles in one transaction"""
+				if not self._pending:
+						return
+				with self.conn:
+						self.conn.executemany("""
+								UPDATE contacts 
+								SET profile_content = ?,
+										enriched = 1,
+										enriched_at = ?,
+										model_used = ?
+								WHERE id = ?
+						""", self._pending)
+				self._pending.clear()
+			
+		def _throttle(self):
+				"""Wait until this request's start slot under ENRICH_MIN_INTERVAL"""
+				with self._throttle_lock:
+						now = time.monotonic()
+						start = max(now, self._next_request_at)
+						self._next_request_at = start + ENRICH_MIN_INTERVAL
+				time.sleep(start - now)
+			
+		def _fetch_enrichment(self, contact):
+				"""Fetch one contact's profile; returns (content, None) or (None, error line)"""
 			
 				name = f"{contact['firstname']} {contact['lastname']}"
 				company = contact['company']
@@ -61,9 +142,9 @@ Provide:
 Be concise. Focus on sales-relevant information."""
 			
 				try:
-						response = requests.post(
+						self._throttle()
+						response = self.session.post(
 								self.base_url,
-								headers={"Authorization": f"Bearer {self.api_key}"},
 								json={
 										"model": self.model,
 										"messages": [{"role": "user", "content": prompt}],
@@ -74,26 +155,10 @@ Be concise. Focus on sales-relevant information."""
 						)
 						response.raise_for_status()
 					
-						content = response.json()['choices'][0]['message']['content']
-					
-						# Store in database
-						conn = sqlite3.connect(self.db_path)
-						conn.execute("""
-								UPDATE contacts 
-								SET profile_content = ?,
-										enriched = 1,
-										enriched_at = ?,
-										model_used = ?
-								WHERE id = ?
-						""", (content, datetime.now(timezone.utc).isoformat(), self.model, contact['id']))
-						conn.commit()
-						conn.close()
-					
-						return True
+						return response.json()['choices'][0]['message']['content'], None
 			
 				except Exception as e:
-						print(f"  ❌ Error enriching {name}: {str(e)}")
-						return False
+						return None, f"  ❌ Error enriching {name}: {str(e)}"
 			
 		def batch_enrich(self, count=10, auto_generate=True):
 				"""Enrich multiple contacts in batch"""
@@ -122,29 +187,24 @@ Be concise. Focus on sales-relevant information."""
 				enriched = 0
 				failed = 0
 			
-				for i, contact in enumerate(contacts, 1):
-						name = f"{contact['firstname']} {contact['lastname']}"
-						print(f"[{i}/{len(contacts)}] {name} ({contact['company']}) - Score: {contact['score']}")
+				# Enrichment requests run concurrently; results are reported (and
+				# content generated) in priority order as they complete
+				with ThreadPoolExecutor(max_workers=ENRICH_CONCURRENCY) as pool:
+						results = pool.map(self._fetch_enrichment, contacts)
 					
-						if self.enrich_contact(contact):
-								enriched += 1
-								print(f"  ✅ Enriched")
-							
-								# Auto-generate content if requested
-								if auto_generate:
-										print(f"  📧 Generating email variants...")
-										os.system(f"python email_variant_generator.py {contact['id']} > /dev/null 2>&1")
-										print(f"  📞 Generating call scripts...")
-										os.system(f"python call_script_generator.py {contact['id']} > /dev/null 2>&1")
-										print(f"  ✅ Content generated")
-									
-								# Rate limiting
-								time.sleep(2)
-						else:
-								failed += 1
-							
-						print()
+						for i, (contact, (content, error)) in enumerate(zip(contacts, results), 1):
+								if error:
+										failed += 1
+								else:
+										enriched += 1
+										self._queue_enrichment(contact, content)
+										# Content generation reads the stored profile
+										if auto_generate or len(self._pending) >= ENRICH_FLUSH_SIZE:
+												self._flush_enrichments()
+								self._report_enrichment(i, len(contacts), contact, error, auto_generate)
 					
+				self._flush_enrichments()
+			
 				print(f"\n{'='*70}")
 				print(f"✅ Batch Complete")
 				print(f"{'='*70}")
@@ -154,26 +214,62 @@ Be concise. Focus on sales-relevant information."""
 				print(f"New Total Enriched: {self.get_enriched_count()}")
 				print(f"{'='*70}\n")
 			
+		def _report_enrichment(self, i, total, contact, error, auto_generate):
+				"""Print one contact's enrichment result and generate its content"""
+				name = f"{contact['firstname']} {contact['lastname']}"
+				print(f"[{i}/{total}] {name} ({contact['company']}) - Score: {contact['score']}")
+			
+				if error:
+						print(error)
+				else:
+						print(f"  ✅ Enriched")
+					
+						# Auto-generate content if requested
+						if auto_generate:
+								print(f"  📧 Generating email variants...")
+								os.system(f"python email_variant_generator.py {contact['id']} > /dev/null 2>&1")
+								print(f"  📞 Generating call scripts...")
+								if self._generate_call_scripts(contact['id']):
+										print(f"  ✅ Content generated")
+							
+				print()
+			
+		def _generate_call_scripts(self, contact_id):
+				"""Generate and save call scripts; returns True once all variants are saved"""
+				if self._call_gen is None:
+						return os.system(f"python call_script_generator.py {contact_id} > /dev/null 2>&1") == 0
+				try:
+						# The generator narrates each variant; keep the batch report to one line per step
+						with contextlib.redirect_stdout(io.StringIO()):
+								scripts = self._call_gen.generate_all_scripts(contact_id)
+				except Exception as e:
+						print(f"  ⚠️  Call script generation failed: {e}")
+						return False
+			
+				# generate_all_scripts() only saves when every variant succeeded
+				if not scripts or len(scripts) < len(self._call_gen.script_styles):
+						print(f"  ⚠️  Call scripts incomplete; nothing saved")
+						return False
+				return True
+			
 		def get_enriched_count(self):
 				"""Get total enriched contact count"""
-				conn = sqlite3.connect(self.db_path)
-				count = conn.execute("SELECT COUNT(*) FROM contacts WHERE enriched = 1").fetchone()[0]
-				conn.close()
-				return count
+				return self.conn.execute("SELECT COUNT(*) FROM contacts WHERE enriched = 1").fetchone()[0]
 	
 		def get_stats(self):
 				"""Get enrichment statistics"""
-				conn = sqlite3.connect(self.db_path)
+				# One pass over contacts; COALESCE keeps counts at 0 on an empty table
+				row = self.conn.execute("""
+						SELECT COUNT(*),
+								COALESCE(SUM(enriched = 1), 0),
+								COALESCE(SUM(score IS NOT NULL), 0),
+								COALESCE(SUM(score > 60), 0),
+								COALESCE(SUM(email_1_subject IS NOT NULL), 0)
+						FROM contacts
+				""").fetchone()
 			
-				stats = {
-						'total': conn.execute("SELECT COUNT(*) FROM contacts").fetchone()[0],
-						'enriched': conn.execute("SELECT COUNT(*) FROM contacts WHERE enriched = 1").fetchone()[0],
-						'with_score': conn.execute("SELECT COUNT(*) FROM contacts WHERE score IS NOT NULL").fetchone()[0],
-						'high_score': conn.execute("SELECT COUNT(*) FROM contacts WHERE score > 60").fetchone()[0],
-						'with_content': conn.execute("SELECT COUNT(*) FROM contacts WHERE email_1_subject IS NOT NULL").fetchone()[0]
-				}
+				stats = dict(zip(('total', 'enriched', 'with_score', 'high_score', 'with_content'), row))
 			
-				conn.close()
 				return stats
 	
 	
@@ -231,4 +327,6 @@ Examples:
 						print(f"{i:2d}. {c['firstname']} {c['lastname']:20s} | {c['company']:30s} | Score: {c['score']}")
 				print(f"={'='*70}")
 				print(f"Estimated cost: ${len(contacts) * 0.15:.2f}\n")
+			
+		engine.close()
 			
\ No newline at end of file